@@ -2,17 +2,19 @@
 Command-line interface for bookmark management system.
 """
 import click
+import io
+import sys
 from pathlib import Path
 import logging
 import json
+import orjson
+from collections import defaultdict
+from datetime import datetime
+from functools import lru_cache
+from itertools import chain
 from typing import List, Dict, Any, Optional
 
 from models.database import DatabaseManager, setup_logging
-from parsers.html_parser import HTMLBookmarkParser
-from parsers.yaml_parser import YAMLBookmarkParser
-from parsers.feed_processor import FeedProcessor
-from utils.deduplication import BookmarkDeduplicator
-from utils.metadata_extractor import MetadataExtractor
 
 
 @click.group()
@@ -34,6 +36,7 @@ def cli(ctx, verbose, database):
     ctx.ensure_object(dict)
     ctx.obj['db'] = DatabaseManager(database)
     ctx.obj['verbose'] = verbose
+    ctx.call_on_close(ctx.obj['db'].close)
 
     # Log which database we're using
     click.echo(f"Using database: {ctx.obj['db'].db_path}")
@@ -53,13 +56,37 @@ def import_bookmarks(ctx, source, directory):
     click.echo(f"Importing bookmarks from: {ingest_path}")
     click.echo(f"Source types: {source}")
 
+    yaml_file = ingest_path / '+++.md'
+    feeds_path = ingest_path / '--db-feeds'
+
+    # Parsers pull in lxml/yaml; import only the ones this run needs
+    jobs = []
+    if source in ['all', 'html']:
+        from parsers.html_parser import HTMLBookmarkParser
+        jobs.append(('html', lambda: HTMLBookmarkParser(db).parse_directory(ingest_path)))
+    if source in ['all', 'yaml'] and yaml_file.exists():
+        from parsers.yaml_parser import YAMLBookmarkParser
+        jobs.append(('yaml', lambda: YAMLBookmarkParser(db).parse_yaml_file(yaml_file)))
+    if source in ['all', 'feeds'] and feeds_path.exists():
+        from parsers.feed_processor import FeedProcessor
+        jobs.append(('feeds', lambda: FeedProcessor(db).process_feed_directory(feeds_path)))
+
+    # Sources run one after another in html, yaml, feeds order: a URL found
+    # in several sources keeps the first one's row, so the order must not
+    # depend on thread timing. Parsers spread their own files over processes.
+    source_results = {}
+    if jobs:
+        # Full-text search is rebuilt once at the end instead of per inserted row
+        with db.bulk_mode():
+            for label, job in jobs:
+                source_results[label] = job()
+
     total_imported = 0
     total_errors = 0
 
     if source in ['all', 'html']:
         click.echo("\n📄 Importing HTML bookmark files...")
-        parser = HTMLBookmarkParser(db)
-        results = parser.parse_directory(ingest_path)
+        results = source_results['html']
 
         click.echo(f"HTML Import Results:")
         click.echo(f"  Files processed: {results['files_processed']}")
@@ -72,11 +99,9 @@ def import_bookmarks(ctx, source, directory):
 
     if source in ['all', 'yaml']:
         click.echo("\n📝 Importing YAML structured bookmarks...")
-        parser = YAMLBookmarkParser(db)
-        yaml_file = ingest_path / '+++.md'
 
-        if yaml_file.exists():
-            results = parser.parse_yaml_file(yaml_file)
+        if 'yaml' in source_results:
+            results = source_results['yaml']
 
             click.echo(f"YAML Import Results:")
             click.echo(f"  Bookmarks imported: {results['stats']['imported']}")
@@ -90,11 +115,9 @@ def import_bookmarks(ctx, source, directory):
 
     if source in ['all', 'feeds']:
         click.echo("\n📊 Importing categorized feeds...")
-        processor = FeedProcessor(db)
-        feeds_path = ingest_path / '--db-feeds'
 
-        if feeds_path.exists():
-            results = processor.process_feed_directory(feeds_path)
+        if 'feeds' in source_results:
+            results = source_results['feeds']
 
             click.echo(f"Feed Import Results:")
             click.echo(f"  Files processed: {results['files_processed']}")
@@ -120,6 +143,8 @@ def import_bookmarks(ctx, source, directory):
 @click.pass_context
 def deduplicate(ctx, similarity, auto, report_only):
     """Find and remove duplicate bookmarks."""
+    from utils.deduplication import BookmarkDeduplicator
+
     db = ctx.obj['db']
     deduplicator = BookmarkDeduplicator(db)
 
@@ -150,9 +175,9 @@ def deduplicate(ctx, similarity, auto, report_only):
         click.echo(f"  Bookmarks merged: {results['bookmarks_merged']}")
         click.echo(f"  Bookmarks archived: {results['bookmarks_archived']}")
 
-        if results['errors']:
-            click.echo(f"  Errors: {len(results['errors'])}")
-            for error in results['errors'][:5]:
+        if results['error_count']:
+            click.echo(f"  Errors: {results['error_count']}")
+            for error in results['error_samples'][:5]:
                 click.echo(f"    - {error}")
 
     else:
@@ -170,7 +195,7 @@ def deduplicate(ctx, similarity, auto, report_only):
             for j, bookmark in enumerate(group):
                 click.echo(f"  {j+1}. {bookmark['title'][:60]}...")
                 click.echo(f"     URL: {bookmark['url'][:80]}...")
-                click.echo(f"     Source: {bookmark['source']} | Created: {bookmark['created_at']}")
+                click.echo(f"     Source: {bookmark['source']} | Created: {_format_created(bookmark['created_at'])}")
 
             if click.confirm("Merge this group?"):
                 bookmark_ids = [b['id'] for b in group]
@@ -184,19 +209,21 @@ def deduplicate(ctx, similarity, auto, report_only):
 @cli.command()
 @click.option('--batch-size', '-b', default=50, type=int, help='Batch size for processing')
 @click.option('--max-workers', '-w', default=5, type=int, help='Maximum parallel workers')
+@click.option('--max-age', default=7, type=int, help='Reuse cached page metadata younger than this many days')
+@click.option('--refresh', is_flag=True, help='Ignore cached metadata and refetch every page')
 @click.pass_context
-def enrich(ctx, batch_size, max_workers):
+def enrich(ctx, batch_size, max_workers, max_age, refresh):
     """Enrich bookmarks with metadata from web pages."""
+    from utils.metadata_extractor import MetadataExtractor
+
     db = ctx.obj['db']
     extractor = MetadataExtractor(db)
 
     click.echo(f"🌐 Enriching bookmarks (batch: {batch_size}, workers: {max_workers})...")
 
     with click.progressbar(length=batch_size, label='Enriching bookmarks') as bar:
-        def update_progress():
-            bar.update(1)
-
-        results = extractor.bulk_enrich_bookmarks(batch_size, max_workers)
+        results = extractor.bulk_enrich_bookmarks(batch_size, max_workers, progress_callback=bar.update,
+                                                  max_age=max_age * 86400, refresh=refresh)
 
     click.echo(f"\nEnrichment Results:")
     click.echo(f"  Processed: {results['processed']}")
@@ -211,15 +238,21 @@ def enrich(ctx, batch_size, max_workers):
 
 @cli.command()
 @click.option('--batch-size', '-b', default=100, type=int, help='Number of URLs to check')
+@click.option('--max-age', default=7, type=int, help='Trust pages fetched successfully within this many days')
+@click.option('--refresh', is_flag=True, help='Ignore cached metadata and check every URL')
+@click.option('--workers', '-w', default=16, type=int, help='Number of URLs checked in parallel')
 @click.pass_context
-def validate(ctx, batch_size):
+def validate(ctx, batch_size, max_age, refresh, workers):
     """Validate bookmark URLs and mark broken links."""
+    from utils.metadata_extractor import MetadataExtractor
+
     db = ctx.obj['db']
     extractor = MetadataExtractor(db)
 
     click.echo(f"🔗 Validating {batch_size} bookmark URLs...")
 
-    results = extractor.validate_all_bookmarks(batch_size)
+    results = extractor.validate_all_bookmarks(batch_size, max_age=max_age * 86400, refresh=refresh,
+                                               max_workers=workers)
 
     click.echo(f"\nValidation Results:")
     click.echo(f"  URLs checked: {results['checked']}")
@@ -234,50 +267,60 @@ def validate(ctx, batch_size):
 
 @cli.command()
 @click.option('--query', '-q', help='Search query')
-@click.option('--tag', '-t', help='Filter by tag')
+@click.option('--tag', '-t', help='Filter by exact tag name')
+@click.option('--tag-like', help='Filter by tags containing this text')
 @click.option('--domain', help='Filter by domain')
 @click.option('--limit', '-l', default=20, type=int, help='Number of results')
 @click.option('--format', '-f', type=click.Choice(['table', 'json', 'urls']),
               default='table', help='Output format')
 @click.pass_context
-def search(ctx, query, tag, domain, limit, format):
+def search(ctx, query, tag, tag_like, domain, limit, format):
     """Search bookmarks."""
-    db = ctx.obj['db']
-
-    conditions = []
     params = []
 
-    base_query = """
-        SELECT b.id, b.url, b.title, b.description, b.domain, b.created_at,
-               GROUP_CONCAT(t.name, ', ') as tags
-        FROM bookmarks b
-        LEFT JOIN bookmark_tags bt ON b.id = bt.bookmark_id
-        LEFT JOIN tags t ON bt.tag_id = t.id
-        WHERE b.status = 'active'
-    """
-
     if query:
-        conditions.append("b.id IN (SELECT rowid FROM bookmark_search WHERE bookmark_search MATCH ?)")
         params.append(query)
 
     if tag:
-        conditions.append("b.id IN (SELECT bt.bookmark_id FROM bookmark_tags bt JOIN tags t ON bt.tag_id = t.id WHERE t.name LIKE ?)")
-        params.append(f"%{tag}%")
+        params.append(tag)
+
+    if tag_like:
+        params.append(f"%{tag_like}%")
 
     if domain:
-        conditions.append("b.domain LIKE ?")
         params.append(f"%{domain}%")
 
-    if conditions:
-        base_query += " AND " + " AND ".join(conditions)
-
-    base_query += " GROUP BY b.id ORDER BY b.created_at DESC LIMIT ?"
     params.append(limit)
+    urls_only = format == 'urls'
+    base_query = _search_sql(bool(query), bool(tag), bool(tag_like), bool(domain), urls_only)
 
     try:
-        with db.get_connection() as conn:
+        with ctx.obj['db'].read_connection() as conn:
             cursor = conn.execute(base_query, params)
-            results = [dict(row) for row in cursor.fetchall()]
+            results = []
+            for row in cursor.fetchmany(limit):
+                bookmark = dict(row)
+                # Many results share a domain; keep one string object per distinct value
+                if bookmark.get('domain'):
+                    bookmark['domain'] = sys.intern(bookmark['domain'])
+                results.append(bookmark)
+
+            # The URL listing never shows tags, so skip looking them up
+            if results and not urls_only:
+                bookmark_tags = defaultdict(list)
+                placeholders = ','.join('?' for _ in results)
+                cursor = conn.execute(f"""
+                    SELECT bt.bookmark_id, t.name
+                    FROM bookmark_tags bt
+                    JOIN tags t ON t.id = bt.tag_id
+                    WHERE bt.bookmark_id IN ({placeholders})
+                """, [bookmark['id'] for bookmark in results])
+                for bookmark_id, name in cursor:
+                    bookmark_tags[bookmark_id].append(name)
+
+                for bookmark in results:
+                    names = bookmark_tags.get(bookmark['id'])
+                    bookmark['tags'] = ', '.join(names) if names else None
     except Exception as e:
         click.echo(f"Search error: {e}")
         return
@@ -287,7 +330,9 @@ def search(ctx, query, tag, domain, limit, format):
         return
 
     if format == 'json':
-        click.echo(json.dumps(results, indent=2, default=str))
+        for bookmark in results:
+            bookmark['created_at'] = _created_iso(bookmark['created_at'])
+        click.echo(orjson.dumps(results, option=orjson.OPT_INDENT_2).decode())
 
     elif format == 'urls':
         for bookmark in results:
@@ -297,16 +342,27 @@ def search(ctx, query, tag, domain, limit, format):
         click.echo(f"\nFound {len(results)} bookmarks:")
         click.echo("-" * 100)
 
-        for bookmark in results:
-            title = bookmark['title'][:60] + "..." if len(bookmark['title']) > 60 else bookmark['title']
-            url = bookmark['url'][:50] + "..." if len(bookmark['url']) > 50 else bookmark['url']
-            tags = bookmark['tags'][:30] + "..." if bookmark['tags'] and len(bookmark['tags']) > 30 else (bookmark['tags'] or '')
+        # Build the page in one buffer and write it out in a single echo,
+        # flushing every few hundred rows for very large limits
+        buf = io.StringIO()
+        for i, bookmark in enumerate(results, 1):
+            title = bookmark['title'] or ''
+            url = bookmark['url']
+            tags = bookmark['tags'] or ''
+
+            # Precision in the format spec truncates without slicing
+            buf.write(
+                f"[{bookmark['id']}] {title:.60}{'...' if len(title) > 60 else ''}\n"
+                f"    URL: {url:.50}{'...' if len(url) > 50 else ''}\n"
+                f"    Domain: {bookmark['domain']} | Tags: {tags:.30}{'...' if len(tags) > 30 else ''}\n"
+                f"    Created: {_format_created(bookmark['created_at'])}\n\n"
+            )
 
-            click.echo(f"[{bookmark['id']}] {title}")
-            click.echo(f"    URL: {url}")
-            click.echo(f"    Domain: {bookmark['domain']} | Tags: {tags}")
-            click.echo(f"    Created: {bookmark['created_at']}")
-            click.echo("")
+            if i % 500 == 0:
+                click.echo(buf.getvalue(), nl=False)
+                buf = io.StringIO()
+
+        click.echo(buf.getvalue(), nl=False)
 
 
 @cli.command()
@@ -330,7 +386,7 @@ def add(ctx, url, title, description, tags):
 
     if bookmark_id:
         if tags:
-            tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
+            tag_list = list(dict.fromkeys(tag.strip() for tag in tags.split(',') if tag.strip()))
             db.add_bookmark_tags(bookmark_id, tag_list)
 
         click.echo(f"✅ Added bookmark {bookmark_id}: {title or url}")
@@ -360,86 +416,218 @@ def stats(ctx):
 
 @cli.command()
 @click.option('--output', '-o', help='Output file path')
-@click.option('--format', '-f', type=click.Choice(['json', 'csv', 'yaml']),
+@click.option('--format', '-f', type=click.Choice(['json', 'ndjson', 'csv', 'yaml']),
               default='json', help='Export format')
-@click.option('--tag', '-t', help='Filter by tag')
+@click.option('--tag', '-t', help='Filter by exact tag name')
+@click.option('--tag-like', help='Filter by tags containing this text')
 @click.pass_context
-def export(ctx, output, format, tag):
+def export(ctx, output, format, tag, tag_like):
     """Export bookmarks to various formats."""
-    db = ctx.obj['db']
-
-    # Build query
-    query = """
-        SELECT b.id, b.url, b.title, b.description, b.domain,
-               b.created_at, b.source, GROUP_CONCAT(t.name, ',') as tags
-        FROM bookmarks b
-        LEFT JOIN bookmark_tags bt ON b.id = bt.bookmark_id
-        LEFT JOIN tags t ON bt.tag_id = t.id
-        WHERE b.status = 'active'
-    """
     params = []
 
     if tag:
-        query += """ AND b.id IN (
-            SELECT bt.bookmark_id FROM bookmark_tags bt
-            JOIN tags t ON bt.tag_id = t.id
-            WHERE t.name LIKE ?
-        )"""
-        params.append(f"%{tag}%")
+        params.append(tag)
+
+    if tag_like:
+        params.append(f"%{tag_like}%")
 
-    query += " GROUP BY b.id ORDER BY b.created_at DESC"
+    query = _export_sql(format == 'csv', bool(tag), bool(tag_like))
 
     try:
-        with db.get_connection() as conn:
+        with ctx.obj['db'].read_connection() as conn:
             cursor = conn.execute(query, params)
-            bookmarks = [dict(row) for row in cursor.fetchall()]
+            first_row = cursor.fetchone()
+
+            if first_row is None:
+                click.echo("No bookmarks found to export.")
+                return
+
+            if not output and format not in ('json', 'ndjson'):
+                click.echo("Specify --output for CSV/YAML export")
+                return
+
+            # Stream rows straight from the cursor instead of building a list
+            rows = chain([first_row], cursor)
+            if format != 'csv':
+                bookmarks = (_export_record(row) for row in rows)
+
+            if output:
+                output_path = Path(output)
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+
+                if format == 'json':
+                    with open(output_path, 'wb') as f:
+                        count = _write_json_array(f, bookmarks)
+
+                elif format == 'ndjson':
+                    with open(output_path, 'wb') as f:
+                        count = _write_ndjson(f, bookmarks)
+
+                elif format == 'csv':
+                    with open(output_path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+                        count = _write_csv(f, first_row.keys(), rows)
+
+                elif format == 'yaml':
+                    import yaml
+                    # libyaml's C emitter when available; pure-Python fallback otherwise
+                    dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+                    with open(output_path, 'w', encoding='utf-8') as f:
+                        count = 0
+                        for bookmark in bookmarks:
+                            # Dumping one-item lists back to back yields the same block sequence
+                            yaml.dump([bookmark], f, Dumper=dumper, default_flow_style=False, allow_unicode=True)
+                            count += 1
+
+                click.echo(f"✅ Exported {count} bookmarks to {output_path}")
+
+            else:
+                # Print to stdout
+                stdout = click.get_binary_stream('stdout')
+                if format == 'ndjson':
+                    _write_ndjson(stdout, bookmarks)
+                else:
+                    _write_json_array(stdout, bookmarks)
+                    stdout.write(b'\n')
+
     except Exception as e:
         click.echo(f"Export error: {e}")
-        return
 
-    if not bookmarks:
-        click.echo("No bookmarks found to export.")
-        return
 
-    # Process tags
-    for bookmark in bookmarks:
-        if bookmark['tags']:
-            bookmark['tags'] = [tag.strip() for tag in bookmark['tags'].split(',') if tag.strip()]
-        else:
-            bookmark['tags'] = []
-
-    if output:
-        output_path = Path(output)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-
-        if format == 'json':
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(bookmarks, f, indent=2, default=str)
-
-        elif format == 'csv':
-            import csv
-            with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                if bookmarks:
-                    writer = csv.DictWriter(f, fieldnames=bookmarks[0].keys())
-                    writer.writeheader()
-                    for bookmark in bookmarks:
-                        # Convert tags list to string for CSV
-                        bookmark['tags'] = ', '.join(bookmark['tags']) if bookmark['tags'] else ''
-                        writer.writerow(bookmark)
-
-        elif format == 'yaml':
-            import yaml
-            with open(output_path, 'w', encoding='utf-8') as f:
-                yaml.dump(bookmarks, f, default_flow_style=False, allow_unicode=True)
-
-        click.echo(f"✅ Exported {len(bookmarks)} bookmarks to {output_path}")
+def _created_iso(value, sep: str = 'T', timespec: str = 'auto'):
+    """ISO-8601 local time for a created_at stored as epoch milliseconds; other values pass through."""
+    if isinstance(value, int):
+        return datetime.fromtimestamp(value / 1000).isoformat(sep=sep, timespec=timespec)
+    return value
+
+
+def _format_created(value) -> str:
+    """Render a created_at for the human-readable listings."""
+    return str(_created_iso(value, sep=' ', timespec='seconds'))
+
+
+@lru_cache(maxsize=None)
+def _search_sql(has_query: bool, has_tag: bool, has_tag_like: bool, has_domain: bool,
+                urls_only: bool = False) -> str:
+    """Build the search SQL for one filter combination; cached so SQLite sees identical text."""
+    joins = []
+    conditions = []
+
+    if has_query:
+        joins.append("JOIN bookmark_search ON bookmark_search.rowid = b.id")
+        conditions.append("bookmark_search MATCH ?")
+
+    # An exact tag name matches at most one tag, so a plain join can't repeat
+    # rows and lets the planner start from the unique tags.name index
+    if has_tag:
+        joins.append("JOIN bookmark_tags ft ON ft.bookmark_id = b.id JOIN tags ftn ON ftn.id = ft.tag_id")
+        conditions.append("ftn.name = ?")
+
+    # A substring can match several tags on one bookmark; EXISTS avoids duplicates
+    if has_tag_like:
+        conditions.append("EXISTS (SELECT 1 FROM bookmark_tags bt JOIN tags t ON bt.tag_id = t.id WHERE bt.bookmark_id = b.id AND t.name LIKE ?)")
+
+    if has_domain:
+        conditions.append("b.domain LIKE ?")
+
+    columns = "b.url" if urls_only else "b.id, b.url, b.title, b.description, b.domain, b.created_at"
+
+    # Pick the page of bookmarks first; tags are only looked up for those rows
+    query = f"""
+        SELECT {columns}
+        FROM bookmarks b
+        {' '.join(joins)}
+        WHERE b.status = 'active'
+    """
 
+    if conditions:
+        query += " AND " + " AND ".join(conditions)
+
+    return query + " ORDER BY b.created_at DESC LIMIT ?"
+
+
+@lru_cache(maxsize=None)
+def _export_sql(joined_tags: bool, has_tag: bool, has_tag_like: bool) -> str:
+    """Build the export SQL for one output shape and filter; cached like _search_sql."""
+    # CSV takes the tags as one joined string; JSON/YAML get a JSON array
+    # built by SQLite so no per-row splitting is needed.
+    if joined_tags:
+        tags_column = "GROUP_CONCAT(t.name, ', ')"
     else:
-        # Print to stdout
-        if format == 'json':
-            click.echo(json.dumps(bookmarks, indent=2, default=str))
-        else:
-            click.echo("Specify --output for CSV/YAML export")
+        tags_column = "json_group_array(t.name) FILTER (WHERE t.name IS NOT NULL)"
+
+    # Same filter shapes as _search_sql: join for an exact tag, EXISTS for a substring
+    tag_join = "JOIN bookmark_tags ft ON ft.bookmark_id = b.id JOIN tags ftn ON ftn.id = ft.tag_id" if has_tag else ""
+
+    query = f"""
+        SELECT b.id, b.url, b.title, b.description, b.domain,
+               b.created_at, b.source, {tags_column} as tags
+        FROM bookmarks b
+        {tag_join}
+        LEFT JOIN bookmark_tags bt ON b.id = bt.bookmark_id
+        LEFT JOIN tags t ON bt.tag_id = t.id
+        WHERE b.status = 'active'
+    """
+
+    if has_tag:
+        query += " AND ftn.name = ?"
+
+    if has_tag_like:
+        query += """ AND EXISTS (
+            SELECT 1 FROM bookmark_tags lt
+            JOIN tags ltn ON lt.tag_id = ltn.id
+            WHERE lt.bookmark_id = b.id AND ltn.name LIKE ?
+        )"""
+
+    return query + " GROUP BY b.id ORDER BY b.created_at DESC"
+
+
+def _export_record(row) -> Dict[str, Any]:
+    """Convert an export row to a dict, decoding the JSON tag array."""
+    bookmark = dict(row)
+    bookmark['created_at'] = _created_iso(bookmark['created_at'])
+    bookmark['tags'] = json.loads(bookmark['tags'])
+    return bookmark
+
+
+def _write_json_array(f, records) -> int:
+    """Write records as an indented JSON array one element at a time to a binary stream."""
+    count = 0
+    for record in records:
+        f.write(b'[\n  ' if count == 0 else b',\n  ')
+        f.write(orjson.dumps(record, option=orjson.OPT_INDENT_2).replace(b'\n', b'\n  '))
+        count += 1
+    f.write(b'\n]' if count else b'[]')
+    return count
+
+
+def _write_csv(f, columns, rows) -> int:
+    """Write export rows as CSV under a header line in one writerows call."""
+    import csv
+    count = 0
+    created = list(columns).index('created_at')
+
+    def counted():
+        # Tally rows as the writer pulls them, writing created_at as ISO-8601
+        nonlocal count
+        for row in rows:
+            count += 1
+            row = list(row)
+            row[created] = _created_iso(row[created])
+            yield row
+
+    writer = csv.writer(f)
+    writer.writerow(columns)
+    writer.writerows(counted())
+    return count
+
+
+def _write_ndjson(f, records) -> int:
+    """Write records as newline-delimited JSON, one compact object per line."""
+    count = 0
+    for record in records:
+        f.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+        count += 1
+    return count
 
 
 if __name__ == '__main__':
@@ -1,18 +1,373 @@
 """
 Database models and initialization for bookmark management system.
 """
+import os
+import re
 import sqlite3
 import logging
+import time
+import threading
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple, Callable
 from datetime import datetime
+from urllib.parse import urlparse
 import hashlib
 
 
+# Hot-path statements shared by every call so the connection's statement
+# cache reuses the prepared form instead of re-parsing the SQL
+_SQL_INSERT_BOOKMARK = (
+    "INSERT OR IGNORE INTO bookmarks "
+    "(url, title, description, domain, url_hash, url_hash_i, source, source_file, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+# The no-op update lets RETURNING hand back the existing row's id in the same
+# statement; an integer-hash collision on a different URL is still ignored
+_SQL_UPSERT_BOOKMARK = (
+    "INSERT INTO bookmarks "
+    "(url, title, description, domain, url_hash, url_hash_i, source, source_file, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(url_hash) DO UPDATE SET url_hash = excluded.url_hash "
+    "ON CONFLICT DO NOTHING "
+    "RETURNING id"
+)
+_SQL_GET_BOOKMARK_ID_BY_HEX = "SELECT id FROM bookmarks WHERE url_hash = ?"
+_SQL_GET_TAG = "SELECT id FROM tags WHERE name = ?"
+_SQL_INSERT_TAG = "INSERT OR IGNORE INTO tags (name) VALUES (?)"
+_SQL_LINK_TAG = "INSERT OR IGNORE INTO bookmark_tags (bookmark_id, tag_id) VALUES (?, ?)"
+_SQL_BUMP_TAG_USAGE = (
+    "UPDATE tags SET usage_count = usage_count + "
+    "(SELECT delta FROM temp._tag_delta WHERE id = tags.id) "
+    "WHERE id IN (SELECT id FROM temp._tag_delta)"
+)
+_SQL_FILE_PROCESSED = "SELECT 1 FROM import_history WHERE file_path = ? AND file_hash = ? LIMIT 1"
+_SQL_RECORD_IMPORT = (
+    "INSERT OR REPLACE INTO import_history "
+    "(filename, file_path, file_hash, import_type, bookmarks_imported, bookmarks_skipped, errors) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_SQL_GET_FILE_HASH = "SELECT digest FROM file_hashes WHERE file_path = ? AND mtime_ns = ? AND size = ?"
+_SQL_SET_FILE_HASH = "INSERT OR REPLACE INTO file_hashes (file_path, mtime_ns, size, digest) VALUES (?, ?, ?, ?)"
+# Full-text rows for every bookmark, tags included
+_SQL_FILL_SEARCH = """
+    INSERT INTO bookmark_search(rowid, title, description, url, tags)
+    SELECT b.id, b.title, b.description, b.url,
+           COALESCE(GROUP_CONCAT(t.name, ' '), '')
+    FROM bookmarks b
+    LEFT JOIN bookmark_tags bt ON bt.bookmark_id = b.id
+    LEFT JOIN tags t ON t.id = bt.tag_id
+    GROUP BY b.id
+"""
+_SEARCH_TRIGGERS = ('bookmark_search_insert', 'bookmark_search_update', 'bookmark_search_delete')
+
+# Imports larger than this refresh planner statistics right away
+_ANALYZE_THRESHOLD = 10_000
+
+# Bulk inserts larger than this prepare rows in a process pool
+_POOL_THRESHOLD = 50_000
+
+# RETURNING and chained ON CONFLICT clauses in _SQL_UPSERT_BOOKMARK need 3.35
+_MIN_SQLITE_VERSION = (3, 35, 0)
+
+# Bump whenever _SCHEMA_SQL or _migrate_schema changes so existing databases upgrade
+_SCHEMA_VERSION = 4
+
+_SCHEMA_SQL = """
+-- Core bookmarks table (matches Prisma schema exactly, plus the scripts-only url_hash_i)
+CREATE TABLE IF NOT EXISTS bookmarks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT UNIQUE NOT NULL,
+    title TEXT,
+    description TEXT,
+    domain TEXT,
+    url_hash TEXT UNIQUE NOT NULL,
+    url_hash_i INTEGER,
+    created_at DATETIME DEFAULT (CAST(ROUND((julianday('now') - 2440587.5) * 86400000) AS INTEGER)),
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    imported_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    source TEXT NOT NULL,
+    source_file TEXT,
+    status TEXT DEFAULT 'active',
+    favicon_url TEXT,
+    screenshot_url TEXT,
+    content_type TEXT,
+    language TEXT,
+    read_status BOOLEAN DEFAULT false,
+    favorite BOOLEAN DEFAULT false
+);
+
+-- Tags table (matches Prisma schema)
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT UNIQUE NOT NULL,
+    color TEXT DEFAULT '#6B7280',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    usage_count INTEGER DEFAULT 0
+);
+
+-- Many-to-many relationship between bookmarks and tags (matches Prisma schema)
+CREATE TABLE IF NOT EXISTS bookmark_tags (
+    bookmark_id INTEGER NOT NULL,
+    tag_id INTEGER NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (bookmark_id, tag_id),
+    FOREIGN KEY (bookmark_id) REFERENCES bookmarks(id) ON DELETE CASCADE ON UPDATE NO ACTION,
+    FOREIGN KEY (tag_id) REFERENCES tags(id) ON DELETE CASCADE ON UPDATE NO ACTION
+);
+
+-- Collections (hierarchical folders) - matches Prisma schema
+CREATE TABLE IF NOT EXISTS collections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT,
+    parent_id INTEGER,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    color TEXT DEFAULT '#6B7280',
+    icon TEXT,
+    FOREIGN KEY (parent_id) REFERENCES collections(id) ON DELETE SET NULL ON UPDATE NO ACTION
+);
+
+-- Many-to-many relationship between bookmarks and collections - matches Prisma schema
+CREATE TABLE IF NOT EXISTS bookmark_collections (
+    bookmark_id INTEGER NOT NULL,
+    collection_id INTEGER NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (bookmark_id, collection_id),
+    FOREIGN KEY (bookmark_id) REFERENCES bookmarks(id) ON DELETE CASCADE ON UPDATE NO ACTION,
+    FOREIGN KEY (collection_id) REFERENCES collections(id) ON DELETE CASCADE ON UPDATE NO ACTION
+);
+
+-- Import history for tracking processed files - matches Prisma schema
+CREATE TABLE IF NOT EXISTS import_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    filename TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    file_hash TEXT NOT NULL,
+    import_type TEXT NOT NULL,
+    processed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    bookmarks_imported INTEGER DEFAULT 0,
+    bookmarks_skipped INTEGER DEFAULT 0,
+    errors TEXT,
+    UNIQUE(file_path, file_hash)
+);
+
+-- Cached page metadata for enrichment/validation (scripts only, not in Prisma schema)
+CREATE TABLE IF NOT EXISTS metadata_cache (
+    url_hash TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    fetched_at INTEGER NOT NULL,
+    title TEXT,
+    description TEXT,
+    status_code INTEGER,
+    etag TEXT,
+    last_modified TEXT,
+    metadata TEXT
+);
+
+-- Digests of imported files keyed by stat identity, so unchanged files are
+-- not re-read just to be hashed (scripts only, not in Prisma schema)
+CREATE TABLE IF NOT EXISTS file_hashes (
+    file_path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+
+-- Row counts maintained by triggers so get_stats never scans bookmarks
+-- (scripts only, not in Prisma schema). Seeded once from the live tables.
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+
+-- url, url_hash and tag name are UNIQUE, so SQLite already indexes them; drop
+-- the duplicate indexes older databases were created with. Lookups go by
+-- url_hash alone, so the (status, url_hash) partial index only added write cost.
+DROP INDEX IF EXISTS idx_bookmarks_url;
+DROP INDEX IF EXISTS idx_bookmarks_url_hash;
+DROP INDEX IF EXISTS idx_tags_name;
+DROP INDEX IF EXISTS idx_bookmarks_status_url_hash;
+
+-- Integer copy of url_hash: 8-byte keys make the dedup index a quarter of the size
+CREATE UNIQUE INDEX IF NOT EXISTS idx_bookmarks_url_hash_i ON bookmarks(url_hash_i);
+
+-- Create indexes for better performance
+CREATE INDEX IF NOT EXISTS idx_bookmarks_domain ON bookmarks(domain);
+CREATE INDEX IF NOT EXISTS idx_bookmarks_created_at ON bookmarks(created_at);
+CREATE INDEX IF NOT EXISTS idx_bookmarks_source ON bookmarks(source);
+CREATE INDEX IF NOT EXISTS idx_bookmark_tags_tag_id ON bookmark_tags(tag_id);
+CREATE INDEX IF NOT EXISTS idx_collections_parent_id ON collections(parent_id);
+
+-- Optimized indexes for deduplication queries
+CREATE INDEX IF NOT EXISTS idx_bookmarks_status_domain ON bookmarks(status, domain) WHERE status = 'active';
+CREATE INDEX IF NOT EXISTS idx_bookmarks_domain_created ON bookmarks(domain, created_at) WHERE status = 'active';
+
+CREATE TRIGGER IF NOT EXISTS counters_bookmark_insert AFTER INSERT ON bookmarks
+BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'bookmarks';
+    INSERT INTO counters (name, value) VALUES ('src:' || NEW.source, 1)
+    ON CONFLICT(name) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS counters_bookmark_delete AFTER DELETE ON bookmarks
+BEGIN
+    UPDATE counters SET value = value - 1 WHERE name IN ('bookmarks', 'src:' || OLD.source);
+END;
+
+CREATE TRIGGER IF NOT EXISTS counters_bookmark_source AFTER UPDATE OF source ON bookmarks
+WHEN NEW.source IS NOT OLD.source
+BEGIN
+    UPDATE counters SET value = value - 1 WHERE name = 'src:' || OLD.source;
+    INSERT INTO counters (name, value) VALUES ('src:' || NEW.source, 1)
+    ON CONFLICT(name) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS counters_tags_insert AFTER INSERT ON tags
+BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'tags';
+END;
+
+CREATE TRIGGER IF NOT EXISTS counters_tags_delete AFTER DELETE ON tags
+BEGIN
+    UPDATE counters SET value = value - 1 WHERE name = 'tags';
+END;
+
+CREATE TRIGGER IF NOT EXISTS counters_collections_insert AFTER INSERT ON collections
+BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'collections';
+END;
+
+CREATE TRIGGER IF NOT EXISTS counters_collections_delete AFTER DELETE ON collections
+BEGIN
+    UPDATE counters SET value = value - 1 WHERE name = 'collections';
+END;
+"""
+
+# scheme://netloc with a plain host part; anything urlparse would clean up or
+# validate (whitespace, control characters, IPv6 brackets) falls through to it
+_DOMAIN_RE = re.compile(r'[a-zA-Z][a-zA-Z0-9+.\-]*://([^/?#\[\]\t\r\n]*)(?=[/?#]|\Z)')
+
+
+def _extract_domain(url: str) -> str:
+    """Return the URL's netloc, matching urlparse(url).netloc."""
+    match = _DOMAIN_RE.match(url)
+    if match:
+        return match.group(1)
+    return urlparse(url).netloc
+
+
+def _url_hash(url: str) -> str:
+    """Hash a URL for deduplication; the one place the normalization lives."""
+    # Normalize URL for deduplication (remove trailing slashes, fragments, etc.)
+    normalized_url = url.rstrip('/').partition('#')[0].lower()
+    return hashlib.md5(normalized_url.encode('utf-8', 'replace')).hexdigest()
+
+
+def _hash_urls(urls: List[str]) -> List[str]:
+    """Hash many URLs in one comprehension."""
+    return [_url_hash(url) for url in urls]
+
+
+def _url_hash_int(url_hash: str) -> int:
+    """Fold a hex URL hash to its first 8 bytes as a signed 64-bit SQLite integer."""
+    return int.from_bytes(bytes.fromhex(url_hash[:16]), 'little', signed=True)
+
+
+def _epoch_ms(value: Any) -> Optional[int]:
+    """Convert an ISO-8601 timestamp to epoch milliseconds, Prisma's DateTime storage."""
+    # Naive values are local time, as the parsers write them. Anything that
+    # is not a timestamp gives None so callers fall back to the current time
+    # rather than storing text in the integer column.
+    if isinstance(value, str):
+        try:
+            return int(datetime.fromisoformat(value).timestamp() * 1000)
+        except (ValueError, OverflowError, OSError):
+            return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value)
+    return None
+
+
+def process_pool_context() -> multiprocessing.context.BaseContext:
+    """Start method for worker pools that never forks the calling process."""
+    # Pools are started from import_bookmarks' worker threads; forking while a
+    # sibling holds the DB lock, a SQLite handle or an OpenSSL lock can leave
+    # the child deadlocked, so workers come from a clean server process instead
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def _parse_or_none(parse: Callable[[Path], Any], file_path: Path) -> Any:
+    """Run parse in a worker, returning None on failure instead of raising."""
+    try:
+        return parse(file_path)
+    except Exception:
+        return None
+
+
+def parse_files_in_workers(parse: Callable[[Path], Any], files: List[Path], todo: List[Path],
+                           chunksize: int = 1) -> Iterator[Tuple[Path, Any]]:
+    """Yield (file, parsed) for every file in order, parsing those in todo in worker processes.
+
+    parsed is None for files outside todo, for every file when a pool is not
+    worth starting, and for any file a worker failed on; callers parse those
+    themselves and report errors through their usual per-file handling.
+    Results come back in file order, so callers' database writes run exactly
+    as in a serial import. parse must be picklable, e.g. a bound method of a
+    parser built without a database.
+    """
+    # Workers only pay off with a second core and a second file; otherwise
+    # pickling every result back costs more than the parse itself
+    if len(todo) < 2 or (os.cpu_count() or 1) < 2:
+        for file_path in files:
+            yield file_path, None
+        return
+
+    with ProcessPoolExecutor(max_workers=os.cpu_count(),
+                             mp_context=process_pool_context()) as executor:
+        parsed_files = executor.map(partial(_parse_or_none, parse), todo, chunksize=chunksize)
+        todo = set(todo)
+        for file_path in files:
+            yield file_path, next(parsed_files, None) if file_path in todo else None
+
+
+def _prep(bookmark: Dict[str, Any], now: Optional[int]) -> Tuple:
+    """Build the _SQL_INSERT_BOOKMARK parameter tuple for one bookmark."""
+    # Bound once: this runs per row in every bulk insert
+    get = bookmark.get
+    url = bookmark['url']
+    url_hash = _url_hash(url)
+    return (
+        url,
+        get('title', ''),
+        get('description', ''),
+        _extract_domain(url),
+        url_hash,
+        _url_hash_int(url_hash),
+        get('source', 'manual'),
+        get('source_file', ''),
+        _epoch_ms(get('created_at')) or now or int(time.time() * 1000)
+    )
+
+
 class DatabaseManager:
     """Manages SQLite database operations for bookmark system."""
 
     def __init__(self, db_path: str = "database/bookmarks.db"):
+        if sqlite3.sqlite_version_info < _MIN_SQLITE_VERSION:
+            raise RuntimeError(
+                f"SQLite {'.'.join(map(str, _MIN_SQLITE_VERSION))} or newer is required, "
+                f"but Python is linked against {sqlite3.sqlite_version}"
+            )
+
         # Handle both absolute and relative paths
         if not Path(db_path).is_absolute():
             # For relative paths, look for webapp database first
@@ -26,275 +381,497 @@ class DatabaseManager:
 
         self.db_path.parent.mkdir(exist_ok=True, parents=True)
         self.logger = logging.getLogger(__name__)
+
+        # One shared connection; the re-entrant lock serializes threads and
+        # the depth counter lets nested blocks join the outer transaction
+        self._conn = self._connect()
+        self._lock = threading.RLock()
+        self._depth = 0
+        # Tag usage increments buffered by add_bookmark_tags until flush_tag_counts
+        self._tag_delta: Counter = Counter()
+        # Set while bulk_mode has the FTS triggers suspended
+        self._bulk = False
+        self._conn.execute("PRAGMA journal_mode = WAL")
         self.init_database()
 
-    def get_connection(self) -> sqlite3.Connection:
-        """Get database connection with foreign keys enabled."""
-        conn = sqlite3.connect(self.db_path)
+    def _connect(self) -> sqlite3.Connection:
+        """Open a tuned connection with foreign keys enabled."""
+        # Generous busy timeout so concurrent importers wait for the write lock
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False,
+                               cached_statements=512)
         conn.execute("PRAGMA foreign_keys = ON")
+        # Per-connection settings; WAL makes NORMAL sync safe against corruption
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -64000")
+        conn.execute("PRAGMA mmap_size = 268435456")
         conn.row_factory = sqlite3.Row
         return conn
 
+    @contextmanager
+    def get_connection(self) -> Iterator[sqlite3.Connection]:
+        """Yield the shared connection, committing when the outermost block exits."""
+        with self._lock:
+            self._depth += 1
+            try:
+                yield self._conn
+                if self._depth == 1:
+                    self._conn.commit()
+            except BaseException:
+                if self._depth == 1:
+                    self._conn.rollback()
+                raise
+            finally:
+                self._depth -= 1
+
+    @contextmanager
+    def read_connection(self) -> Iterator[sqlite3.Connection]:
+        """Yield the shared connection for read-only queries; nothing is committed."""
+        with self._lock:
+            yield self._conn
+
+    def close(self) -> None:
+        """Flush buffered tag counts, refresh planner stats and close the shared connection."""
+        with self._lock:
+            self.flush_tag_counts()
+            self.optimize()
+            self._conn.close()
+
     def init_database(self) -> None:
         """Initialize database tables and indexes to match Prisma schema."""
         with self.get_connection() as conn:
-            # Core bookmarks table (matches Prisma schema exactly)
+            # Databases already at the current schema skip every CREATE statement
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < _SCHEMA_VERSION:
+                self._migrate_schema(conn)
+
+            fts_sql = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE name = 'bookmark_search'"
+            ).fetchone()
+            self.fts_enabled = bool(fts_sql) and fts_sql[0].upper().startswith('CREATE VIRTUAL TABLE')
+
+            # A process killed inside bulk_mode never gets to restore the
+            # triggers; put them back and catch the index up with the table
+            if self.fts_enabled:
+                present = conn.execute(
+                    f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' "
+                    f"AND name IN ({','.join('?' for _ in _SEARCH_TRIGGERS)})",
+                    _SEARCH_TRIGGERS
+                ).fetchone()[0]
+                if present < len(_SEARCH_TRIGGERS):
+                    self.logger.warning("Search triggers missing; recreating them and rebuilding the index")
+                    self._create_search_triggers(conn)
+                    self.rebuild_search_index()
+
+    def _migrate_schema(self, conn: sqlite3.Connection) -> None:
+        """Create or upgrade the schema and stamp it with _SCHEMA_VERSION."""
+        has_counters = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'counters'"
+        ).fetchone()
+
+        # Search triggers from older schemas fire on every UPDATE of bookmarks,
+        # and those on a content='bookmarks' FTS table fail against the current
+        # columns; drop them before the backfills below and recreate them after
+        for trigger in _SEARCH_TRIGGERS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+        # Full-text search virtual table. It stores its own content because
+        # bookmarks has no tags column for an external-content table to read
+        fts_sql = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'bookmark_search'"
+        ).fetchone()
+        if fts_sql and "content='bookmarks'" in fts_sql[0]:
+            self.logger.info("Rebuilding bookmark_search as a self-contained FTS table")
+            conn.execute("DROP TABLE bookmark_search")
+            fts_sql = None
+
+        # Older databases predate url_hash_i; the schema script indexes it
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(bookmarks)")}
+        if columns and 'url_hash_i' not in columns:
+            conn.execute("ALTER TABLE bookmarks ADD COLUMN url_hash_i INTEGER")
+
+        # file_hashes briefly cached SHA-256 digests, which import_history never
+        # matches; it is only a cache, so start it over
+        if 'sha256' in {row[1] for row in conn.execute("PRAGMA table_info(file_hashes)")}:
+            conn.execute("DROP TABLE file_hashes")
+
+        conn.executescript(_SCHEMA_SQL)
+
+        # created_at is stored as epoch milliseconds like Prisma writes it;
+        # older scripts wrote ISO-8601 text, which sorts apart from integers.
+        # Converted with _epoch_ms so naive values read as local time exactly
+        # as they do for new inserts.
+        text_dates = conn.execute(
+            "SELECT id, created_at FROM bookmarks WHERE typeof(created_at) = 'text'"
+        ).fetchall()
+        if text_dates:
+            now = int(time.time() * 1000)
+            conn.executemany(
+                "UPDATE bookmarks SET created_at = ? WHERE id = ?",
+                [(_epoch_ms(created_at) or now, bookmark_id) for bookmark_id, created_at in text_dates]
+            )
+
+        missing = conn.execute(
+            "SELECT id, url_hash FROM bookmarks WHERE url_hash_i IS NULL"
+        ).fetchall()
+        if missing:
+            conn.executemany(
+                "UPDATE OR IGNORE bookmarks SET url_hash_i = ? WHERE id = ?",
+                [(_url_hash_int(url_hash), bookmark_id) for bookmark_id, url_hash in missing]
+            )
+
+        if not fts_sql:
             conn.execute("""
-                CREATE TABLE IF NOT EXISTS bookmarks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    url TEXT UNIQUE NOT NULL,
-                    title TEXT,
-                    description TEXT,
-                    domain TEXT,
-                    url_hash TEXT UNIQUE NOT NULL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    imported_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    source TEXT NOT NULL,
-                    source_file TEXT,
-                    status TEXT DEFAULT 'active',
-                    favicon_url TEXT,
-                    screenshot_url TEXT,
-                    content_type TEXT,
-                    language TEXT,
-                    read_status BOOLEAN DEFAULT false,
-                    favorite BOOLEAN DEFAULT false
+                CREATE VIRTUAL TABLE bookmark_search USING fts5(
+                    title, description, url, tags
                 )
             """)
+            conn.execute(_SQL_FILL_SEARCH)
 
-            # Tags table (matches Prisma schema)
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS tags (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT UNIQUE NOT NULL,
-                    color TEXT DEFAULT '#6B7280',
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    usage_count INTEGER DEFAULT 0
-                )
-            """)
+        self._create_search_triggers(conn)
 
-            # Many-to-many relationship between bookmarks and tags (matches Prisma schema)
+        if not has_counters:
             conn.execute("""
-                CREATE TABLE IF NOT EXISTS bookmark_tags (
-                    bookmark_id INTEGER NOT NULL,
-                    tag_id INTEGER NOT NULL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    PRIMARY KEY (bookmark_id, tag_id),
-                    FOREIGN KEY (bookmark_id) REFERENCES bookmarks(id) ON DELETE CASCADE ON UPDATE NO ACTION,
-                    FOREIGN KEY (tag_id) REFERENCES tags(id) ON DELETE CASCADE ON UPDATE NO ACTION
-                )
+                INSERT INTO counters (name, value)
+                SELECT 'bookmarks', COUNT(*) FROM bookmarks
+                UNION ALL SELECT 'tags', COUNT(*) FROM tags
+                UNION ALL SELECT 'collections', COUNT(*) FROM collections
+                UNION ALL SELECT 'src:' || source, COUNT(*) FROM bookmarks GROUP BY source
             """)
 
-            # Collections (hierarchical folders) - matches Prisma schema
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS collections (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    description TEXT,
-                    parent_id INTEGER,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    color TEXT DEFAULT '#6B7280',
-                    icon TEXT,
-                    FOREIGN KEY (parent_id) REFERENCES collections(id) ON DELETE SET NULL ON UPDATE NO ACTION
-                )
-            """)
-
-            # Many-to-many relationship between bookmarks and collections - matches Prisma schema
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS bookmark_collections (
-                    bookmark_id INTEGER NOT NULL,
-                    collection_id INTEGER NOT NULL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    PRIMARY KEY (bookmark_id, collection_id),
-                    FOREIGN KEY (bookmark_id) REFERENCES bookmarks(id) ON DELETE CASCADE ON UPDATE NO ACTION,
-                    FOREIGN KEY (collection_id) REFERENCES collections(id) ON DELETE CASCADE ON UPDATE NO ACTION
-                )
-            """)
-
-            # Import history for tracking processed files - matches Prisma schema
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS import_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    filename TEXT NOT NULL,
-                    file_path TEXT NOT NULL,
-                    file_hash TEXT NOT NULL,
-                    import_type TEXT NOT NULL,
-                    processed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    bookmarks_imported INTEGER DEFAULT 0,
-                    bookmarks_skipped INTEGER DEFAULT 0,
-                    errors TEXT,
-                    UNIQUE(file_path, file_hash)
-                )
-            """)
-
-            # Create indexes for better performance
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_bookmarks_url ON bookmarks(url)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_bookmarks_domain ON bookmarks(domain)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_bookmarks_created_at ON bookmarks(created_at)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_bookmarks_source ON bookmarks(source)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_bookmarks_url_hash ON bookmarks(url_hash)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_tags_name ON tags(name)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_collections_parent_id ON collections(parent_id)")
-            
-            # Optimized indexes for deduplication queries
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_bookmarks_status_domain ON bookmarks(status, domain) WHERE status = 'active'")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_bookmarks_status_url_hash ON bookmarks(status, url_hash) WHERE status = 'active'")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_bookmarks_domain_created ON bookmarks(domain, created_at) WHERE status = 'active'")
-
-            # Full-text search virtual table
-            conn.execute("""
-                CREATE VIRTUAL TABLE IF NOT EXISTS bookmark_search USING fts5(
-                    title, description, url, tags,
-                    content='bookmarks', content_rowid='id'
-                )
-            """)
-
-            # Trigger to keep FTS table in sync
-            conn.execute("""
-                CREATE TRIGGER IF NOT EXISTS bookmark_search_insert AFTER INSERT ON bookmarks
-                BEGIN
-                    INSERT INTO bookmark_search(rowid, title, description, url, tags)
-                    SELECT
-                        NEW.id,
-                        NEW.title,
-                        NEW.description,
-                        NEW.url,
-                        COALESCE(
-                            (SELECT GROUP_CONCAT(t.name, ' ')
-                             FROM tags t
-                             JOIN bookmark_tags bt ON t.id = bt.tag_id
-                             WHERE bt.bookmark_id = NEW.id),
-                            ''
-                        );
-                END
-            """)
-
-            conn.execute("""
-                CREATE TRIGGER IF NOT EXISTS bookmark_search_update AFTER UPDATE ON bookmarks
-                BEGIN
-                    UPDATE bookmark_search
-                    SET title = NEW.title,
-                        description = NEW.description,
-                        url = NEW.url,
-                        tags = COALESCE(
-                            (SELECT GROUP_CONCAT(t.name, ' ')
-                             FROM tags t
-                             JOIN bookmark_tags bt ON t.id = bt.tag_id
-                             WHERE bt.bookmark_id = NEW.id),
-                            ''
-                        )
-                    WHERE rowid = NEW.id;
-                END
-            """)
-
-            conn.execute("""
-                CREATE TRIGGER IF NOT EXISTS bookmark_search_delete AFTER DELETE ON bookmarks
-                BEGIN
-                    DELETE FROM bookmark_search WHERE rowid = OLD.id;
-                END
-            """)
+        conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        conn.commit()
+        self.logger.info("Database initialized successfully")
+
+    def _create_search_triggers(self, conn: sqlite3.Connection) -> None:
+        """Create the triggers that keep bookmark_search in step with bookmarks."""
+        # Tags are linked after the bookmark row is inserted, so they are filled
+        # in by sync_fts_tags
+        for trigger in _SEARCH_TRIGGERS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.execute("""
+            CREATE TRIGGER bookmark_search_insert AFTER INSERT ON bookmarks
+            BEGIN
+                INSERT INTO bookmark_search(rowid, title, description, url, tags)
+                VALUES (NEW.id, NEW.title, NEW.description, NEW.url, '');
+            END
+        """)
+
+        conn.execute("""
+            CREATE TRIGGER bookmark_search_update AFTER UPDATE OF title, description, url ON bookmarks
+            BEGIN
+                UPDATE bookmark_search
+                SET title = NEW.title,
+                    description = NEW.description,
+                    url = NEW.url,
+                    tags = COALESCE(
+                        (SELECT GROUP_CONCAT(t.name, ' ')
+                         FROM tags t
+                         JOIN bookmark_tags bt ON t.id = bt.tag_id
+                         WHERE bt.bookmark_id = NEW.id),
+                        ''
+                    )
+                WHERE rowid = NEW.id;
+            END
+        """)
 
-            conn.commit()
-            self.logger.info("Database initialized successfully")
+        conn.execute("""
+            CREATE TRIGGER bookmark_search_delete AFTER DELETE ON bookmarks
+            BEGIN
+                DELETE FROM bookmark_search WHERE rowid = OLD.id;
+            END
+        """)
 
     def generate_url_hash(self, url: str) -> str:
         """Generate a consistent hash for URL deduplication."""
-        # Normalize URL for deduplication (remove trailing slashes, fragments, etc.)
-        normalized_url = url.rstrip('/').split('#')[0].lower()
-        return hashlib.md5(normalized_url.encode()).hexdigest()
+        return _url_hash(url)
+
+    def generate_url_hashes(self, urls: List[str]) -> List[str]:
+        """Generate URL hashes for a batch of URLs."""
+        return _hash_urls(urls)
 
     def insert_bookmark(self, bookmark_data: Dict[str, Any]) -> Optional[int]:
         """Insert a new bookmark and return its ID."""
         try:
             with self.get_connection() as conn:
-                # Generate URL hash for deduplication
-                url_hash = self.generate_url_hash(bookmark_data['url'])
+                # Same row layout as the bulk path; the clock is only read
+                # when the bookmark carries no created_at of its own
+                cursor = conn.execute(_SQL_UPSERT_BOOKMARK, _prep(bookmark_data, None))
 
-                # Extract domain from URL
-                from urllib.parse import urlparse
-                domain = urlparse(bookmark_data['url']).netloc
+                # New and existing rows both come back here
+                result = cursor.fetchone()
+                if result:
+                    self.logger.debug(f"Upserted bookmark: {bookmark_data['url']}")
+                    return result[0]
 
-                cursor = conn.execute("""
-                    INSERT OR IGNORE INTO bookmarks
-                    (url, title, description, domain, url_hash, source, source_file, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    bookmark_data['url'],
-                    bookmark_data.get('title', ''),
-                    bookmark_data.get('description', ''),
-                    domain,
-                    url_hash,
-                    bookmark_data.get('source', 'manual'),
-                    bookmark_data.get('source_file', ''),
-                    bookmark_data.get('created_at', datetime.now().isoformat())
-                ))
-
-                if cursor.rowcount > 0:
-                    bookmark_id = cursor.lastrowid
-                    self.logger.debug(f"Inserted bookmark: {bookmark_data['url']}")
-                    return bookmark_id
+        except Exception as e:
+            self.logger.error(f"Error inserting bookmark {bookmark_data.get('url', '')}: {e}")
+            return None
+
+    def insert_bookmarks_bulk(self, bookmarks: List[Dict[str, Any]]) -> List[Optional[int]]:
+        """Insert many bookmarks in one transaction and return their IDs in input order."""
+        if not bookmarks:
+            return []
+
+        now = int(time.time() * 1000)
+
+        try:
+            with self.get_connection() as conn:
+                if not conn.in_transaction:
+                    conn.execute("BEGIN IMMEDIATE")
+                # Check foreign keys once at COMMIT instead of per statement
+                conn.execute("PRAGMA defer_foreign_keys = ON")
+
+                if len(bookmarks) > _POOL_THRESHOLD:
+                    # Hash and parse in worker processes while this thread writes
+                    rows = []
+                    with process_pool_context().Pool() as pool:
+                        prepared = pool.imap(partial(_prep, now=now), bookmarks, chunksize=4096)
+                        while True:
+                            chunk = list(islice(prepared, 5000))
+                            if not chunk:
+                                break
+                            conn.executemany(_SQL_INSERT_BOOKMARK, chunk)
+                            rows.extend(chunk)
                 else:
-                    # Bookmark already exists, get its ID
+                    rows = [_prep(bookmark, now) for bookmark in bookmarks]
+                    conn.executemany(_SQL_INSERT_BOOKMARK, rows)
+
+                # Backfill IDs for new and pre-existing rows alike
+                ids_by_hash = {}
+                hash_ints = list(dict.fromkeys(row[5] for row in rows))
+                for start in range(0, len(hash_ints), 500):
+                    chunk = hash_ints[start:start + 500]
+                    placeholders = ','.join('?' for _ in chunk)
                     cursor = conn.execute(
-                        "SELECT id FROM bookmarks WHERE url_hash = ?",
-                        (url_hash,)
+                        f"SELECT url_hash_i, id FROM bookmarks WHERE url_hash_i IN ({placeholders})",
+                        chunk
                     )
-                    result = cursor.fetchone()
-                    if result:
-                        self.logger.debug(f"Bookmark already exists: {bookmark_data['url']}")
-                        return result[0]
+                    ids_by_hash.update(cursor.fetchall())
+
+                # Rows written by other clients may not carry the integer hash yet
+                for row in rows:
+                    if row[5] not in ids_by_hash:
+                        result = conn.execute(_SQL_GET_BOOKMARK_ID_BY_HEX, (row[4],)).fetchone()
+                        if result:
+                            ids_by_hash[row[5]] = result[0]
+
+            self.logger.debug(f"Bulk inserted {len(rows)} bookmarks")
+            return [ids_by_hash.get(row[5]) for row in rows]
 
         except Exception as e:
-            self.logger.error(f"Error inserting bookmark {bookmark_data.get('url', '')}: {e}")
-            return None
+            self.logger.error(f"Error bulk inserting {len(bookmarks)} bookmarks: {e}")
+            return [None] * len(bookmarks)
+
+    def import_parsed_bookmarks(self, bookmarks: List[Dict[str, Any]], source_file: str,
+                                source: str) -> Tuple[int, int]:
+        """Insert a parsed file's bookmarks and tags in bulk and return (imported, skipped)."""
+        bookmark_ids = self.insert_bookmarks_bulk([
+            {
+                'url': bookmark['url'],
+                'title': bookmark['title'],
+                'description': bookmark.get('description', ''),
+                'source': bookmark.get('source', source),
+                'source_file': source_file,
+                'created_at': bookmark['created_at']
+            }
+            for bookmark in bookmarks
+        ])
+
+        self.add_bookmark_tags_bulk([
+            (bookmark_id, bookmark['tags'])
+            for bookmark, bookmark_id in zip(bookmarks, bookmark_ids)
+            if bookmark_id and bookmark.get('tags')
+        ])
+
+        imported = sum(1 for bookmark_id in bookmark_ids if bookmark_id)
+        return imported, len(bookmark_ids) - imported
 
     def get_or_create_tag(self, tag_name: str) -> Optional[int]:
         """Get existing tag ID or create new tag."""
         try:
             with self.get_connection() as conn:
                 # Try to get existing tag
-                cursor = conn.execute("SELECT id FROM tags WHERE name = ?", (tag_name,))
+                cursor = conn.execute(_SQL_GET_TAG, (tag_name,))
                 result = cursor.fetchone()
 
                 if result:
                     return result[0]
 
                 # Create new tag
-                cursor = conn.execute(
-                    "INSERT INTO tags (name) VALUES (?)",
-                    (tag_name,)
-                )
+                cursor = conn.execute(_SQL_INSERT_TAG, (tag_name,))
                 return cursor.lastrowid
 
         except Exception as e:
             self.logger.error(f"Error getting/creating tag {tag_name}: {e}")
             return None
 
-    def add_bookmark_tags(self, bookmark_id: int, tag_names: List[str]) -> None:
-        """Add tags to a bookmark."""
+    def add_bookmark_tags(self, bookmark_id: int, tag_names: List[str],
+                          sync_fts: bool = True) -> None:
+        """Add tags to a bookmark, buffering the usage count update."""
+        self.add_bookmark_tags_bulk([(bookmark_id, tag_names)], sync_fts=sync_fts,
+                                    flush_counts=False)
+
+    def add_bookmark_tags_bulk(self, bookmark_tags: List[Tuple[int, List[str]]],
+                               sync_fts: bool = True, flush_counts: bool = True) -> None:
+        """Add tags to many bookmarks in one transaction."""
         try:
+            links = []
+            for bookmark_id, tag_names in bookmark_tags:
+                names = dict.fromkeys(name.strip() for name in tag_names if name.strip())
+                links.extend((bookmark_id, name) for name in names)
+            if not links:
+                return
+
             with self.get_connection() as conn:
-                for tag_name in tag_names:
-                    if not tag_name.strip():
-                        continue
-
-                    tag_id = self.get_or_create_tag(tag_name.strip())
-                    if tag_id:
-                        conn.execute("""
-                            INSERT OR IGNORE INTO bookmark_tags (bookmark_id, tag_id)
-                            VALUES (?, ?)
-                        """, (bookmark_id, tag_id))
-
-                        # Update tag usage count
-                        conn.execute("""
-                            UPDATE tags
-                            SET usage_count = usage_count + 1
-                            WHERE id = ?
-                        """, (tag_id,))
+                # The link rows reference ids resolved just above or below, so
+                # their foreign keys are checked once at COMMIT
+                if not conn.in_transaction:
+                    conn.execute("BEGIN IMMEDIATE")
+                conn.execute("PRAGMA defer_foreign_keys = ON")
+
+                # Resolve every tag the batch needs up front, creating missing ones
+                names = list(dict.fromkeys(name for _, name in links))
+                tag_ids = self._select_tag_ids(conn, names)
+                missing = [name for name in names if name not in tag_ids]
+                if missing:
+                    conn.executemany(_SQL_INSERT_TAG, [(name,) for name in missing])
+                    tag_ids.update(self._select_tag_ids(conn, missing))
+
+                conn.executemany(_SQL_LINK_TAG, [
+                    (bookmark_id, tag_ids[name]) for bookmark_id, name in links
+                ])
+
+                if sync_fts:
+                    self.sync_fts_tags([bookmark_id for bookmark_id, _ in links])
+
+            # Buffer usage counts only once the deferred checks have passed;
+            # other import threads flush the same Counter, so hold the lock
+            with self._lock:
+                self._tag_delta.update(tag_ids[name] for _, name in links)
+                if flush_counts:
+                    self.flush_tag_counts()
 
         except Exception as e:
-            self.logger.error(f"Error adding tags to bookmark {bookmark_id}: {e}")
+            self.logger.error(f"Error adding tags to {len(bookmark_tags)} bookmarks: {e}")
+
+    def flush_tag_counts(self) -> None:
+        """Apply buffered tag usage increments with one UPDATE per unique tag."""
+        with self._lock:
+            # Snapshot and clear under the lock so increments buffered by other
+            # threads land either in this flush or the next one
+            if not self._tag_delta:
+                return
+            delta = dict(self._tag_delta)
+            self._tag_delta.clear()
+
+            try:
+                with self.get_connection() as conn:
+                    conn.execute(
+                        "CREATE TEMP TABLE IF NOT EXISTS _tag_delta (id INTEGER PRIMARY KEY, delta INTEGER)"
+                    )
+                    conn.execute("DELETE FROM temp._tag_delta")
+                    conn.executemany("INSERT INTO temp._tag_delta (id, delta) VALUES (?, ?)",
+                                     delta.items())
+                    conn.execute(_SQL_BUMP_TAG_USAGE)
+
+            except Exception as e:
+                # Keep the increments for the next flush
+                self._tag_delta.update(delta)
+                self.logger.error(f"Error flushing usage counts for {len(delta)} tags: {e}")
+
+    def _select_tag_ids(self, conn: sqlite3.Connection, names: List[str]) -> Dict[str, int]:
+        """Look up tag IDs by name in chunks that stay under SQLite's variable limit."""
+        tag_ids = {}
+        for start in range(0, len(names), 500):
+            chunk = names[start:start + 500]
+            placeholders = ','.join('?' for _ in chunk)
+            cursor = conn.execute(f"SELECT name, id FROM tags WHERE name IN ({placeholders})", chunk)
+            tag_ids.update(cursor.fetchall())
+        return tag_ids
+
+    def sync_fts_tags(self, bookmark_ids: List[int]) -> None:
+        """Refresh the full-text tags column for the given bookmarks."""
+        bookmark_ids = list(dict.fromkeys(bookmark_ids))
+        if not bookmark_ids or self._bulk:
+            return
+
+        try:
+            with self.get_connection() as conn:
+                for start in range(0, len(bookmark_ids), 500):
+                    chunk = bookmark_ids[start:start + 500]
+                    placeholders = ','.join('?' for _ in chunk)
+                    conn.execute(f"""
+                        UPDATE bookmark_search
+                        SET tags = COALESCE(
+                            (SELECT GROUP_CONCAT(t.name, ' ')
+                             FROM tags t
+                             JOIN bookmark_tags bt ON t.id = bt.tag_id
+                             WHERE bt.bookmark_id = bookmark_search.rowid),
+                            ''
+                        )
+                        WHERE rowid IN ({placeholders})
+                    """, chunk)
+
+        except Exception as e:
+            self.logger.error(f"Error syncing search tags for {len(bookmark_ids)} bookmarks: {e}")
+
+    def rebuild_search_index(self) -> None:
+        """Repopulate bookmark_search from bookmarks and their tags."""
+        if not self.fts_enabled:
+            return
+
+        try:
+            with self.get_connection() as conn:
+                conn.execute("DELETE FROM bookmark_search")
+                conn.execute(_SQL_FILL_SEARCH)
+
+        except Exception as e:
+            self.logger.error(f"Error rebuilding search index: {e}")
+
+    @contextmanager
+    def bulk_mode(self) -> Iterator[None]:
+        """Suspend per-row FTS triggers for a bulk load and rebuild the index once afterwards."""
+        if not self.fts_enabled or self._bulk:
+            yield
+            return
+
+        with self.get_connection() as conn:
+            for trigger in _SEARCH_TRIGGERS:
+                conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        self._bulk = True
+
+        try:
+            yield
+        finally:
+            self._bulk = False
+            with self.get_connection() as conn:
+                self._create_search_triggers(conn)
+                self.rebuild_search_index()
+            self.optimize_search_index()
+
+    def optimize_search_index(self) -> None:
+        """Merge full-text index segments after a large import."""
+        if not self.fts_enabled:
+            return
+
+        try:
+            with self.get_connection() as conn:
+                conn.execute("INSERT INTO bookmark_search(bookmark_search) VALUES('optimize')")
+
+        except Exception as e:
+            self.logger.error(f"Error optimizing search index: {e}")
+
+    def optimize(self) -> None:
+        """Let SQLite refresh planner statistics that have gone stale."""
+        try:
+            with self.get_connection() as conn:
+                # Bound the work ANALYZE does per index so this stays cheap
+                conn.execute("PRAGMA analysis_limit = 1000")
+                conn.execute("PRAGMA optimize")
+
+        except Exception as e:
+            self.logger.error(f"Error optimizing database: {e}")
 
     def record_import(self, filename: str, file_path: str, file_hash: str,
                      import_type: str, bookmarks_imported: int,
@@ -302,13 +879,12 @@ class DatabaseManager:
         """Record import history."""
         try:
             with self.get_connection() as conn:
-                conn.execute("""
-                    INSERT OR REPLACE INTO import_history
-                    (filename, file_path, file_hash, import_type,
-                     bookmarks_imported, bookmarks_skipped, errors)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (filename, file_path, file_hash, import_type,
-                      bookmarks_imported, bookmarks_skipped, errors))
+                conn.execute(_SQL_RECORD_IMPORT, (filename, file_path, file_hash, import_type,
+                                                  bookmarks_imported, bookmarks_skipped, errors))
+
+                if bookmarks_imported > _ANALYZE_THRESHOLD:
+                    conn.execute("ANALYZE bookmarks")
+                    conn.execute("ANALYZE tags")
 
         except Exception as e:
             self.logger.error(f"Error recording import history: {e}")
@@ -317,37 +893,75 @@ class DatabaseManager:
         """Check if a file has already been processed."""
         try:
             with self.get_connection() as conn:
-                cursor = conn.execute("""
-                    SELECT id FROM import_history
-                    WHERE file_path = ? AND file_hash = ?
-                """, (file_path, file_hash))
+                cursor = conn.execute(_SQL_FILE_PROCESSED, (file_path, file_hash))
                 return cursor.fetchone() is not None
 
         except Exception as e:
             self.logger.error(f"Error checking if file is processed: {e}")
             return False
 
-    def get_stats(self) -> Dict[str, int]:
-        """Get database statistics."""
+    def get_cached_file_hash(self, file_path: str, mtime_ns: int, size: int) -> Optional[str]:
+        """Return the stored digest of a file whose mtime and size are unchanged."""
+        try:
+            with self.get_connection() as conn:
+                row = conn.execute(_SQL_GET_FILE_HASH, (file_path, mtime_ns, size)).fetchone()
+                return row[0] if row else None
+
+        except Exception as e:
+            self.logger.error(f"Error reading cached file hash: {e}")
+            return None
+
+    def cache_file_hash(self, file_path: str, mtime_ns: int, size: int, file_hash: str) -> None:
+        """Store a file's digest against its current mtime and size."""
         try:
             with self.get_connection() as conn:
-                stats = {}
+                conn.execute(_SQL_SET_FILE_HASH, (file_path, mtime_ns, size, file_hash))
 
-                # Get bookmark counts
-                cursor = conn.execute("SELECT COUNT(*) FROM bookmarks")
-                stats['total_bookmarks'] = cursor.fetchone()[0]
+        except Exception as e:
+            self.logger.error(f"Error caching file hash: {e}")
 
-                cursor = conn.execute("SELECT COUNT(*) FROM tags")
-                stats['total_tags'] = cursor.fetchone()[0]
+    def get_tag_counts(self, source: str, file_prefix: str) -> Dict[str, int]:
+        """Count bookmarks per tag among one source's files under a path prefix, most used first."""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.execute("""
+                    SELECT t.name, COUNT(*) AS uses
+                    FROM bookmark_tags bt
+                    JOIN bookmarks b ON b.id = bt.bookmark_id
+                    JOIN tags t ON t.id = bt.tag_id
+                    WHERE b.source = :source
+                      AND substr(b.source_file, 1, length(:prefix)) = :prefix
+                    GROUP BY bt.tag_id
+                    ORDER BY uses DESC, t.name
+                """, {'source': source, 'prefix': file_prefix})
+                return dict(cursor.fetchall())
+
+        except Exception as e:
+            self.logger.error(f"Error getting tag counts: {e}")
+            return {}
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get database statistics."""
+        try:
+            with self.get_connection() as conn:
+                # Totals are point lookups on the trigger-maintained counters
+                cursor = conn.execute(
+                    "SELECT name, value FROM counters WHERE name IN ('bookmarks', 'tags', 'collections')"
+                )
+                totals = dict(cursor.fetchall())
 
-                cursor = conn.execute("SELECT COUNT(*) FROM collections")
-                stats['total_collections'] = cursor.fetchone()[0]
+                stats = {
+                    'total_bookmarks': totals.get('bookmarks', 0),
+                    'total_tags': totals.get('tags', 0),
+                    'total_collections': totals.get('collections', 0)
+                }
 
-                # Get source breakdown
+                # Get source breakdown from the 'src:' prefix range
                 cursor = conn.execute("""
-                    SELECT source, COUNT(*)
-                    FROM bookmarks
-                    GROUP BY source
+                    SELECT substr(name, 5), value
+                    FROM counters
+                    WHERE name >= 'src:' AND name < 'src;' AND value > 0
+                    ORDER BY name
                 """)
                 stats['by_source'] = dict(cursor.fetchall())
 
@@ -2,15 +2,80 @@
 Feed processor for categorized bookmark files.
 Handles the --db-feeds/ directory with topic-based markdown files.
 """
+import os
 import re
+import mmap
+import yaml
 import hashlib
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Generator
-from urllib.parse import urlparse
+from typing import List, Dict, Any, Optional, Generator, Iterator, Tuple
 import logging
 from datetime import datetime
 
-from models.database import DatabaseManager
+from models.database import DatabaseManager, parse_files_in_workers
+
+# libyaml's loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _YAMLLoader
+except ImportError:
+    from yaml import SafeLoader as _YAMLLoader
+
+# Compiled once at import; every section of every feed file runs through these
+_SPLIT_DELIM_RE = re.compile(r'^---\s*$', re.MULTILINE)
+_YAML_FRONT_RE = re.compile(r'^---\s*\n(.*?)\n---\s*\n?(.*)', re.DOTALL)
+
+# Every known key in one pass. The match is a zero-width lookahead at each
+# line start, so a value spilling onto the next line never hides that line's
+# own key; the first alternative that fits a line names it via lastgroup.
+_ENTRY_RE = re.compile(
+    r'^(?=id:\s*(?P<id>\d+)'
+    r'|url:\s*(?P<url>.+)$'
+    r'|created:\s*(?P<created>.+)$'
+    r'|created_at:\s*(?P<created_at>.+)$'
+    r'|tags:\s*\[(?P<tags_array>.*?)\]'
+    r'|tags:\s*(?P<tags>.+)$'
+    r'|source:\s*(?P<source>.+)$'
+    r'|author:\s*(?P<author>.+)$'
+    r'|(?P<line_url>https?://\S+))',
+    re.MULTILINE | re.IGNORECASE
+)
+
+# Fallbacks for sections whose URL or date only appears mid-line
+_URL_ANY_RE = re.compile(r'https?://\S+', re.IGNORECASE)
+_CREATED_ANY_RE = re.compile(r'created:\s*(.+)', re.IGNORECASE)
+
+# Date-only formats as (pattern, group numbers of year, month, day). The
+# month and day groups are strptime's own %m and %d patterns, so these accept
+# exactly what '%Y-%m-%d', '%m/%d/%Y' and '%d-%m-%Y' did, without raising
+# ValueError for every format that does not apply
+_MONTH = r'(1[0-2]|0[1-9]|[1-9])'
+_DAY = r'(3[01]|[12]\d|0[1-9]|[1-9]| [1-9])'
+_DATE_FORMATS = (
+    (re.compile(rf'(\d{{4}})-{_MONTH}-{_DAY}\Z'), (1, 2, 3)),
+    (re.compile(rf'{_MONTH}/{_DAY}/(\d{{4}})\Z'), (3, 1, 2)),
+    (re.compile(rf'{_DAY}-{_MONTH}-(\d{{4}})\Z'), (3, 2, 1)),
+)
+
+# URL schemes are case-insensitive, so JavaScript: is rejected as well
+_BAD_SCHEME_RE = re.compile(r'(?:javascript|data|about):', re.IGNORECASE)
+
+
+def _parse_date(value: str) -> Optional[datetime]:
+    """Build a datetime from the first matching date-only format, or None."""
+    for pattern, groups in _DATE_FORMATS:
+        match = pattern.match(value)
+        if match:
+            year, month, day = (int(match.group(i)) for i in groups)
+            return datetime(year, month, day)
+    return None
+
+
+def _iter_md_files(directory_path: Path) -> Iterator[Tuple[Path, os.stat_result]]:
+    """Yield each .md file in a directory with its stat result from a single scandir pass."""
+    with os.scandir(directory_path) as entries:
+        for entry in entries:
+            if entry.name.endswith('.md') and entry.is_file():
+                yield Path(entry.path), entry.stat()
 
 
 class FeedProcessor:
@@ -19,133 +84,123 @@ class FeedProcessor:
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
         self.logger = logging.getLogger(__name__)
+        # Parsed entries keyed by (path, mtime_ns, size), shared by the
+        # statistics and import passes over the same directory
+        self._parse_cache: Dict[Tuple[str, int, int], List[Dict[str, Any]]] = {}
 
     def calculate_file_hash(self, file_path: Path) -> str:
         """Calculate MD5 hash of file for deduplication."""
         try:
             with open(file_path, 'rb') as f:
-                content = f.read()
-                return hashlib.md5(content).hexdigest()
+                # mmap refuses empty files; their digest is the empty-input one
+                if os.fstat(f.fileno()).st_size == 0:
+                    return hashlib.md5().hexdigest()
+                # Hash the mapped pages directly instead of reading a full copy
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return hashlib.md5(mapped).hexdigest()
         except Exception as e:
-            self.logger.error(f"Error calculating hash for {file_path}: {e}")
+            self.logger.error("Error calculating hash for %s: %s", file_path, e)
             return ""
 
     def extract_category_from_filename(self, filename: str) -> str:
         """Extract category name from filename."""
-        # Remove file extension and clean up the name
+        # Remove file extension and clean up the name; split/join collapses
+        # and trims whitespace runs without going through the regex engine
         category = filename.replace('.md', '').replace('.txt', '')
         category = category.replace('-', ' ').replace('_', ' ')
-        category = re.sub(r'\s+', ' ', category).strip()
-        return category.title()
+        return ' '.join(category.split()).title()
 
     def parse_markdown_entries(self, content: str) -> Generator[Dict[str, Any], None, None]:
         """Parse markdown entries separated by --- delimiters."""
-        # Split content by --- delimiters
-        sections = re.split(r'^---\s*$', content, flags=re.MULTILINE)
-
-        for section in sections:
-            section = section.strip()
-            if not section:
-                continue
-
-            try:
-                # Parse YAML front matter if present
-                yaml_match = re.match(r'^---\s*\n(.*?)\n---\s*\n?(.*)', section, re.DOTALL)
-                if yaml_match:
-                    yaml_content = yaml_match.group(1)
-                    remaining_content = yaml_match.group(2)
-
-                    # Parse YAML content
-                    import yaml
-                    try:
-                        yaml_data = yaml.safe_load(yaml_content)
-                        if isinstance(yaml_data, dict):
-                            yield yaml_data
-                            continue
-                    except yaml.YAMLError:
-                        pass
-
-                # Look for simple patterns in the content
-                entry_data = self.extract_simple_entry(section)
-                if entry_data:
-                    yield entry_data
-
-            except Exception as e:
-                self.logger.debug(f"Error processing section: {e}")
-                continue
+        # Walk the delimiters and slice one section at a time rather than
+        # materializing every section up front
+        prev = 0
+        for delimiter in _SPLIT_DELIM_RE.finditer(content):
+            yield from self._handle_section(content[prev:delimiter.start()])
+            prev = delimiter.end()
+        yield from self._handle_section(content[prev:])
+
+    def _handle_section(self, section: str) -> Generator[Dict[str, Any], None, None]:
+        """Yield the entry found in a single delimited section, if any."""
+        section = section.strip()
+        if not section:
+            return
+
+        try:
+            # Parse YAML front matter if present
+            yaml_match = _YAML_FRONT_RE.match(section)
+            if yaml_match:
+                yaml_content = yaml_match.group(1)
+                remaining_content = yaml_match.group(2)
+
+                # Parse YAML content
+                try:
+                    yaml_data = yaml.load(yaml_content, Loader=_YAMLLoader)
+                    if isinstance(yaml_data, dict):
+                        yield yaml_data
+                        return
+                except yaml.YAMLError:
+                    pass
+
+            # Look for simple patterns in the content
+            entry_data = self.extract_simple_entry(section)
+            if entry_data:
+                yield entry_data
+
+        except Exception as e:
+            # Lazy %-formatting: under the default INFO level this per-section
+            # message is never built
+            self.logger.debug("Error processing section: %s", e)
 
     def extract_simple_entry(self, content: str) -> Optional[Dict[str, Any]]:
         """Extract bookmark data from simple text format."""
-        lines = [line.strip() for line in content.split('\n') if line.strip()]
-        if not lines:
-            return None
+        # Keep the first value seen for each key
+        found = {}
+        for match in _ENTRY_RE.finditer(content):
+            key = match.lastgroup
+            if key not in found:
+                found[key] = match.group(key)
 
         entry_data = {}
 
-        # Look for ID pattern
-        id_match = re.search(r'^id:\s*(\d+)', content, re.MULTILINE | re.IGNORECASE)
-        if id_match:
-            entry_data['id'] = int(id_match.group(1))
-
-        # Look for URL pattern
-        url_patterns = [
-            r'^url:\s*(.+)$',
-            r'^https?://\S+',
-            r'https?://\S+'
-        ]
+        if 'id' in found:
+            entry_data['id'] = int(found['id'])
 
-        for pattern in url_patterns:
-            url_match = re.search(pattern, content, re.MULTILINE | re.IGNORECASE)
+        # A url: line wins over a bare URL line, which wins over one mid-line
+        if 'url' in found:
+            entry_data['url'] = found['url'].strip()
+        elif 'line_url' in found:
+            entry_data['url'] = found['line_url']
+        else:
+            url_match = _URL_ANY_RE.search(content)
             if url_match:
-                url = url_match.group(1) if pattern.startswith('^url:') else url_match.group(0)
-                entry_data['url'] = url.strip()
-                break
-
-        # Look for created date pattern
-        created_patterns = [
-            r'^created:\s*(.+)$',
-            r'^created_at:\s*(.+)$',
-            r'created:\s*(.+)',
-        ]
-
-        for pattern in created_patterns:
-            created_match = re.search(pattern, content, re.MULTILINE | re.IGNORECASE)
+                entry_data['url'] = url_match.group(0)
+
+        if 'created' in found:
+            entry_data['created'] = found['created'].strip()
+        elif 'created_at' in found:
+            entry_data['created'] = found['created_at'].strip()
+        else:
+            created_match = _CREATED_ANY_RE.search(content)
             if created_match:
                 entry_data['created'] = created_match.group(1).strip()
-                break
-
-        # Look for tags pattern
-        tags_patterns = [
-            r'^tags:\s*\[(.*?)\]',
-            r'^tags:\s*(.+)$',
-        ]
-
-        for pattern in tags_patterns:
-            tags_match = re.search(pattern, content, re.MULTILINE | re.IGNORECASE)
-            if tags_match:
-                tags_str = tags_match.group(1).strip()
-                if pattern.endswith(r'\]'):
-                    # Parse array format
-                    tags = [t.strip(' "\'') for t in tags_str.split(',') if t.strip()]
-                else:
-                    tags = [t.strip() for t in tags_str.split(',') if t.strip()]
-                entry_data['tags'] = tags
-                break
-
-        # Look for source pattern
-        source_match = re.search(r'^source:\s*(.+)$', content, re.MULTILINE | re.IGNORECASE)
-        if source_match:
-            entry_data['source'] = source_match.group(1).strip()
-
-        # Look for author pattern
-        author_match = re.search(r'^author:\s*(.+)$', content, re.MULTILINE | re.IGNORECASE)
-        if author_match:
-            entry_data['author'] = author_match.group(1).strip()
+
+        if 'tags_array' in found:
+            entry_data['tags'] = [t.strip(' "\'') for t in found['tags_array'].strip().split(',') if t.strip()]
+        elif 'tags' in found:
+            entry_data['tags'] = [t.strip() for t in found['tags'].strip().split(',') if t.strip()]
+
+        if 'source' in found:
+            entry_data['source'] = found['source'].strip()
+
+        if 'author' in found:
+            entry_data['author'] = found['author'].strip()
 
         return entry_data if 'url' in entry_data or 'id' in entry_data else None
 
-    def normalize_feed_entry(self, entry_data: Dict[str, Any], category: str) -> Optional[Dict[str, Any]]:
-        """Convert feed entry data to normalized bookmark format."""
+    def normalize_feed_entry(self, entry_data: Dict[str, Any], category: str,
+                             now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """Convert feed entry data to normalized bookmark format, dating undated entries at now."""
         try:
             # Skip entries without URLs
             url = entry_data.get('url', '').strip()
@@ -153,7 +208,7 @@ class FeedProcessor:
                 return None
 
             # Skip invalid URLs
-            if url.startswith(('javascript:', 'data:', 'about:')):
+            if _BAD_SCHEME_RE.match(url):
                 return None
 
             # Extract basic fields
@@ -162,43 +217,34 @@ class FeedProcessor:
 
             # Handle creation date
             created_at = entry_data.get('created', entry_data.get('created_at'))
-            if created_at:
-                if isinstance(created_at, str):
-                    try:
-                        # Handle ISO format dates
-                        if 'T' in created_at:
-                            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                        else:
-                            # Try other common formats
-                            for fmt in ['%Y-%m-%d', '%m/%d/%Y', '%d-%m-%Y']:
-                                try:
-                                    created_at = datetime.strptime(created_at, fmt)
-                                    break
-                                except ValueError:
-                                    continue
-                            else:
-                                created_at = datetime.now()
-                    except ValueError:
-                        created_at = datetime.now()
-                else:
-                    created_at = datetime.now()
+            if created_at and isinstance(created_at, str):
+                try:
+                    # Handle ISO format dates
+                    if 'T' in created_at:
+                        created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+                    else:
+                        # Try other common formats
+                        created_at = _parse_date(created_at)
+                except ValueError:
+                    created_at = None
             else:
-                created_at = datetime.now()
+                created_at = None
 
-            # Extract tags (include category as a tag)
-            tags = entry_data.get('tags', [])
-            if not isinstance(tags, list):
-                tags = []
+            # Undated or unparseable entries share the caller's timestamp
+            if created_at is None:
+                created_at = now or datetime.now()
 
-            # Add category as a tag
-            if category and category not in tags:
-                tags.append(category)
+            # Extract tags (include category as a tag)
+            raw_tags = entry_data.get('tags') or []
+            if not isinstance(raw_tags, list):
+                raw_tags = []
 
-            # Extract domain
-            try:
-                domain = urlparse(url).netloc.lower()
-            except:
-                domain = ''
+            # Unique tags in first-seen order, category last; builds a new
+            # list so the parsed entry is left untouched
+            seen = dict.fromkeys(raw_tags)
+            if category:
+                seen[category] = None
+            tags = list(seen)
 
             # Extract additional metadata
             source = entry_data.get('source', 'feed_category')
@@ -217,23 +263,54 @@ class FeedProcessor:
                 'url': url,
                 'title': title if title else url,
                 'description': final_description,
-                'domain': domain,
                 'created_at': created_at.isoformat(),
                 'source': 'feed_category',
                 'category': category,
                 'tags': tags,
-                'feed_id': entry_data.get('id'),
-                'original_data': entry_data
+                'feed_id': entry_data.get('id')
             }
 
             return bookmark
 
         except Exception as e:
-            self.logger.error(f"Error normalizing feed entry: {e}")
+            self.logger.error("Error normalizing feed entry: %s", e)
             return None
 
-    def process_feed_file(self, file_path: Path) -> Dict[str, Any]:
-        """Process a single feed file."""
+    def _cache_key(self, file_path: Path, stat: Optional[os.stat_result] = None) -> Tuple[str, int, int]:
+        """Key a file's parsed entries so edits invalidate them."""
+        if stat is None:
+            stat = file_path.stat()
+        return str(file_path), stat.st_mtime_ns, stat.st_size
+
+    def read_feed_entries(self, file_path: Path,
+                          stat: Optional[os.stat_result] = None) -> List[Dict[str, Any]]:
+        """Read and parse a feed file's raw entries, reusing an earlier parse of the same file."""
+        key = self._cache_key(file_path, stat)
+        entries = self._parse_cache.get(key)
+        if entries is None:
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
+            entries = self._parse_cache[key] = list(self.parse_markdown_entries(content))
+        return entries
+
+    def parse_feed_file(self, file_path: Path) -> Tuple[str, List[Dict[str, Any]]]:
+        """Parse a feed file into its category and normalized bookmarks without touching the database."""
+        # Extract category from filename
+        category = self.extract_category_from_filename(file_path.name)
+
+        # Parse feed entries; one clock read dates every undated entry in the file
+        now = datetime.now()
+        bookmarks = []
+        for entry_data in self.read_feed_entries(file_path):
+            bookmark = self.normalize_feed_entry(entry_data, category, now)
+            if bookmark:
+                bookmarks.append(bookmark)
+
+        return category, bookmarks
+
+    def process_feed_file(self, file_path: Path,
+                          parsed: Optional[Tuple[str, List[Dict[str, Any]]]] = None) -> Dict[str, Any]:
+        """Process a single feed file, reusing a parse_feed_file result when given."""
         results = {
             'bookmarks': [],
             'errors': [],
@@ -246,56 +323,23 @@ class FeedProcessor:
         }
 
         try:
-            self.logger.info(f"Processing feed file: {file_path}")
+            self.logger.info("Processing feed file: %s", file_path)
 
             # Check if file was already processed
             file_hash = self.calculate_file_hash(file_path)
             if self.db.is_file_processed(str(file_path), file_hash):
-                self.logger.info(f"File {file_path.name} already processed, skipping")
+                self.logger.info("File %s already processed, skipping", file_path.name)
                 return results
 
-            # Extract category from filename
-            category = self.extract_category_from_filename(file_path.name)
-
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-
-            # Parse feed entries
-            bookmarks = []
-            for entry_data in self.parse_markdown_entries(content):
-                bookmark = self.normalize_feed_entry(entry_data, category)
-                if bookmark:
-                    bookmarks.append(bookmark)
+            category, bookmarks = parsed or self.parse_feed_file(file_path)
 
             results['bookmarks'] = bookmarks
             results['stats']['total_found'] = len(bookmarks)
 
-            # Import bookmarks to database
-            for bookmark in bookmarks:
-                try:
-                    bookmark_data = {
-                        'url': bookmark['url'],
-                        'title': bookmark['title'],
-                        'description': bookmark['description'],
-                        'source': bookmark['source'],
-                        'source_file': str(file_path),
-                        'created_at': bookmark['created_at']
-                    }
-
-                    bookmark_id = self.db.insert_bookmark(bookmark_data)
-                    if bookmark_id:
-                        # Add tags if present
-                        if bookmark.get('tags'):
-                            self.db.add_bookmark_tags(bookmark_id, bookmark['tags'])
-                        results['stats']['imported'] += 1
-                    else:
-                        results['stats']['skipped'] += 1
-
-                except Exception as e:
-                    error_msg = f"Error importing bookmark {bookmark.get('url', '')}: {e}"
-                    results['errors'].append(error_msg)
-                    results['stats']['errors'] += 1
-                    self.logger.error(error_msg)
+            # Import bookmarks and their tags to the database in bulk
+            imported, skipped = self.db.import_parsed_bookmarks(bookmarks, str(file_path), 'feed_category')
+            results['stats']['imported'] = imported
+            results['stats']['skipped'] = skipped
 
             # Record import in history
             self.db.record_import(
@@ -308,10 +352,9 @@ class FeedProcessor:
                 errors='; '.join(results['errors']) if results['errors'] else None
             )
 
-            self.logger.info(f"Completed processing {file_path.name}: "
-                           f"{results['stats']['imported']} imported, "
-                           f"{results['stats']['skipped']} skipped, "
-                           f"{results['stats']['errors']} errors")
+            self.logger.info("Completed processing %s: %d imported, %d skipped, %d errors",
+                             file_path.name, results['stats']['imported'],
+                             results['stats']['skipped'], results['stats']['errors'])
 
         except Exception as e:
             error_msg = f"Error processing file {file_path}: {e}"
@@ -334,13 +377,22 @@ class FeedProcessor:
 
         try:
             # Find all markdown files
-            md_files = list(directory_path.glob('*.md'))
+            md_stats = dict(_iter_md_files(directory_path))
+            md_files = sorted(md_stats)
+
+            self.logger.info("Found %d feed files to process", len(md_files))
 
-            self.logger.info(f"Found {len(md_files)} feed files to process")
+            # Files already parsed here (e.g. by get_category_statistics) are
+            # reused, and files already imported are never parsed at all; the
+            # rest go to worker processes
+            uncached = [md_file for md_file in md_files
+                        if self._cache_key(md_file, md_stats[md_file]) not in self._parse_cache
+                        and not self.db.is_file_processed(str(md_file), self.calculate_file_hash(md_file))]
 
-            for md_file in sorted(md_files):
+            for md_file, parsed in parse_files_in_workers(FeedProcessor(None).parse_feed_file,
+                                                          md_files, uncached, chunksize=4):
                 try:
-                    file_results = self.process_feed_file(md_file)
+                    file_results = self.process_feed_file(md_file, parsed)
                     category = self.extract_category_from_filename(md_file.name)
 
                     results['files_processed'] += 1
@@ -373,31 +425,26 @@ class FeedProcessor:
         category_stats = {}
 
         try:
-            md_files = list(directory_path.glob('*.md'))
-
-            for md_file in md_files:
+            for md_file, stat in _iter_md_files(directory_path):
                 try:
                     category = self.extract_category_from_filename(md_file.name)
 
-                    with open(md_file, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-
                     bookmark_count = 0
-                    for entry_data in self.parse_markdown_entries(content):
+                    for entry_data in self.read_feed_entries(md_file, stat):
                         if 'url' in entry_data and entry_data['url']:
                             bookmark_count += 1
 
                     category_stats[category] = {
                         'file': md_file.name,
                         'bookmark_count': bookmark_count,
-                        'file_size': md_file.stat().st_size
+                        'file_size': stat.st_size
                     }
 
                 except Exception as e:
-                    self.logger.error(f"Error analyzing {md_file}: {e}")
+                    self.logger.error("Error analyzing %s: %s", md_file, e)
 
         except Exception as e:
-            self.logger.error(f"Error getting category statistics: {e}")
+            self.logger.error("Error getting category statistics: %s", e)
 
         return dict(sorted(category_stats.items(),
                           key=lambda x: x[1]['bookmark_count'],
@@ -2,16 +2,59 @@
 HTML bookmark parser for browser export files.
 Handles Netscape bookmark format used by Chrome, Firefox, Edge, etc.
 """
+import os
 import re
+import sys
 import hashlib
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from urllib.parse import urlparse
-from bs4 import BeautifulSoup
+from typing import List, Dict, Any, Optional, BinaryIO, Iterator, Tuple
+from lxml import etree
 import logging
 from datetime import datetime
 
-from models.database import DatabaseManager
+from models.database import DatabaseManager, parse_files_in_workers
+
+# Only these tags carry bookmark structure: DL opens/closes a folder level,
+# H3 names the folder whose DL follows it, and A is the bookmark itself.
+_STRUCTURE_TAGS = ('dl', 'h3', 'a')
+
+# Compiled once: libxml2 gathers an element's text in C. Plain strings, since
+# the default "smart" results keep a reference to their element.
+_TEXT = etree.XPath('string()', smart_strings=False)
+
+# Links that are scripts or inline data rather than bookmarks
+_BAD_SCHEMES = ('javascript:', 'data:')
+
+# Read size for hashing; exports run to several MB
+_HASH_BUFSIZE = 1 << 20
+
+# Read size when streaming an export into the parser
+_READ_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=65536)
+def _format_add_date(add_date: str) -> Optional[str]:
+    """ISO local time for an ADD_DATE, memoized since overlapping exports repeat them."""
+    try:
+        # Browser timestamps are in seconds since epoch
+        return datetime.fromtimestamp(int(add_date)).isoformat()
+    except (ValueError, OSError):
+        return None
+
+
+def _iter_structure_events(source: BinaryIO) -> Iterator[Tuple[str, Any]]:
+    """Yield start/end events for DL, H3 and A while feeding the file in chunks."""
+    # libxml2 never closes an open <DT> on the next one, so long folders
+    # nest DTs thousands deep; huge_tree lifts the 256-level depth limit.
+    # iterparse() ignores huge_tree in HTML mode, so use the pull parser.
+    parser = etree.HTMLPullParser(events=('start', 'end'), tag=_STRUCTURE_TAGS,
+                                  encoding='utf-8', huge_tree=True)
+    for chunk in iter(lambda: source.read(_READ_SIZE), b''):
+        parser.feed(chunk)
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
 
 
 class HTMLBookmarkParser:
@@ -24,156 +67,96 @@ class HTMLBookmarkParser:
     def calculate_file_hash(self, file_path: Path) -> str:
         """Calculate MD5 hash of file for deduplication."""
         try:
+            # An unchanged mtime and size means the digest stored last run still holds
+            stat = os.stat(file_path)
+            cached = self.db.get_cached_file_hash(str(file_path), stat.st_mtime_ns, stat.st_size)
+            if cached:
+                return cached
+
+            # MD5 stays the import_history key: a different digest would no
+            # longer match the rows of every export imported so far
             with open(file_path, 'rb') as f:
-                content = f.read()
-                return hashlib.md5(content).hexdigest()
+                if sys.version_info >= (3, 11):
+                    file_hash = hashlib.file_digest(f, 'md5', _bufsize=_HASH_BUFSIZE).hexdigest()
+                else:
+                    digest = hashlib.md5()
+                    for chunk in iter(lambda: f.read(_HASH_BUFSIZE), b''):
+                        digest.update(chunk)
+                    file_hash = digest.hexdigest()
+
+            self.db.cache_file_hash(str(file_path), stat.st_mtime_ns, stat.st_size, file_hash)
+            return file_hash
         except Exception as e:
             self.logger.error(f"Error calculating hash for {file_path}: {e}")
             return ""
 
-    def extract_folder_hierarchy(self, element, path: List[str] = None, processed_elements: set = None) -> List[Dict[str, Any]]:
-        """Extract bookmarks and folder structure from HTML."""
-        if path is None:
-            path = []
-        if processed_elements is None:
-            processed_elements = set()
-
+    def extract_folder_hierarchy(self, source: BinaryIO) -> List[Dict[str, Any]]:
+        """Extract bookmarks and folder structure from an HTML stream in a single pass."""
         bookmarks = []
-
-        # For the main DL element, we need to find ALL DT elements recursively
-        # because browser exports often have malformed HTML structure
-        if not path:  # This is the root call
-            # Get all DT elements within this element, regardless of nesting
-            all_dt_elements = element.find_all('dt')
-            
-            # Process each DT element, but keep track of folder structure
-            for dt in all_dt_elements:
-                if id(dt) in processed_elements:
-                    continue
-                processed_elements.add(id(dt))
-                
-                # Determine the path for this element by looking at its ancestors
-                current_path = self._determine_folder_path(dt, element)
-                
-                # Check if this is a folder (H3 element)
-                h3 = dt.find('h3')
-                if h3:
-                    folder_name = h3.get_text(strip=True)
-                    # Skip main "Bookmarks" folder as it's just a container
-                    if folder_name and folder_name.lower() not in ['bookmarks', 'bookmarks bar']:
-                        # For folders, we don't add them as bookmarks, but we note the path
-                        continue
-
-                # Check if this is a bookmark (A element)
-                link = dt.find('a')
-                if link:
-                    bookmark = self.extract_bookmark_info(link, current_path)
-                    if bookmark:
-                        bookmarks.append(bookmark)
-        else:
-            # For nested calls, use the old logic
-            dt_children = []
-            dt_children.extend(element.find_all(['dt'], recursive=False))
-            for p in element.find_all('p', recursive=False):
-                dt_children.extend(p.find_all('dt', recursive=False))
-            
-            for child in dt_children:
-                if id(child) in processed_elements:
-                    continue
-                processed_elements.add(id(child))
-                
-                # Check if this is a folder (H3 element)
-                h3 = child.find('h3')
-                if h3:
-                    folder_name = h3.get_text(strip=True)
-                    if folder_name and folder_name.lower() not in ['bookmarks', 'bookmarks bar']:
-                        new_path = path + [folder_name]
-                        # Find the DL element that contains this folder's bookmarks
-                        dl = child.find_next_sibling('dl')
-                        if dl:
-                            folder_bookmarks = self.extract_folder_hierarchy(dl, new_path, processed_elements)
-                            bookmarks.extend(folder_bookmarks)
-                        else:
-                            dl = child.find('dl')
-                            if dl:
-                                folder_bookmarks = self.extract_folder_hierarchy(dl, new_path, processed_elements)
-                                bookmarks.extend(folder_bookmarks)
-
-                # Check if this is a bookmark (A element)
-                link = child.find('a')
-                if link:
-                    bookmark = self.extract_bookmark_info(link, path)
-                    if bookmark:
-                        bookmarks.append(bookmark)
+        now = datetime.now().isoformat()
+
+        # One entry per open DL: the folder path in effect outside it. Names
+        # are interned and paths are only built when a DL opens, so every
+        # bookmark in a folder shares one tuple of shared strings
+        path_stack = []
+        folder_path = ()
+        folder_name = None
+
+        for event, element in _iter_structure_events(source):
+            if event == 'start':
+                if element.tag == 'dl':
+                    path_stack.append(folder_path)
+                    if folder_name:
+                        folder_path = folder_path + (folder_name,)
+                    folder_name = None
+                continue
+
+            if element.tag == 'dl':
+                folder_path = path_stack.pop() if path_stack else ()
+            elif element.tag == 'h3':
+                folder_name = sys.intern(_TEXT(element).strip())
+                # Skip main "Bookmarks" folder as it's just a container
+                if folder_name.lower() in ['bookmarks', 'bookmarks bar']:
+                    folder_name = None
+            else:
+                bookmark = self.extract_bookmark_info(element, folder_path, now)
+                if bookmark:
+                    bookmarks.append(bookmark)
+
+            # Finished elements are never looked at again: drop their content
+            # (favicon blobs included) and any earlier siblings so the tree
+            # stays a thin spine instead of growing to the whole document
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
 
         return bookmarks
-    
-    def _determine_folder_path(self, dt_element, root_element) -> List[str]:
-        """Determine the folder path for a DT element by examining its ancestors."""
-        path = []
-        
-        # Walk up the DOM tree to find folder ancestors
-        current = dt_element.parent
-        while current and current != root_element:
-            # Look for sibling DT elements with H3 (folder) elements
-            if current.name in ['dl', 'p']:
-                # Check if there's a preceding DT with H3 that could be a folder
-                for sibling in current.find_previous_siblings():
-                    if sibling.name == 'dt':
-                        h3 = sibling.find('h3')
-                        if h3:
-                            folder_name = h3.get_text(strip=True)
-                            if folder_name and folder_name.lower() not in ['bookmarks', 'bookmarks bar']:
-                                path.insert(0, folder_name)
-                            break
-            current = current.parent
-        
-        return path
-
-    def extract_bookmark_info(self, link_element, folder_path: List[str]) -> Optional[Dict[str, Any]]:
-        """Extract bookmark information from anchor element."""
+
+    def extract_bookmark_info(self, link_element, folder_path: Tuple[str, ...],
+                              now: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Extract bookmark information from anchor element, dating undated links at now."""
         try:
             url = link_element.get('href', '').strip()
-            if not url or url.startswith('javascript:') or url.startswith('data:'):
+            if not url or url.startswith(_BAD_SCHEMES):
                 return None
 
-            title = link_element.get_text(strip=True)
+            title = _TEXT(link_element).strip()
             if not title:
                 title = url
 
             # Extract creation date
             add_date = link_element.get('add_date')
-            created_at = None
-            if add_date:
-                try:
-                    # Browser timestamps are in seconds since epoch
-                    created_at = datetime.fromtimestamp(int(add_date))
-                except (ValueError, OSError):
-                    pass
+            created_at = _format_add_date(add_date) if add_date else None
 
             if not created_at:
-                created_at = datetime.now()
-
-            # Extract favicon data
-            icon_data = link_element.get('icon', '')
-            favicon_url = None
-            if icon_data and icon_data.startswith('data:image'):
-                # Store the data URL directly for now
-                favicon_url = icon_data
-
-            # Extract domain
-            try:
-                domain = urlparse(url).netloc.lower()
-            except:
-                domain = ''
+                created_at = now or datetime.now().isoformat()
 
+            # No domain here: the database derives it from the URL on insert
             bookmark = {
                 'url': url,
                 'title': title,
                 'description': '',  # HTML bookmarks don't typically have descriptions
-                'domain': domain,
-                'created_at': created_at.isoformat(),
-                'favicon_url': favicon_url,
+                'created_at': created_at,
                 'folder_path': folder_path,
                 'tags': folder_path,  # Use folder structure as initial tags
             }
@@ -184,8 +167,14 @@ class HTMLBookmarkParser:
             self.logger.error(f"Error extracting bookmark info: {e}")
             return None
 
-    def parse_html_file(self, file_path: Path) -> Dict[str, Any]:
-        """Parse a single HTML bookmark file."""
+    def read_bookmarks(self, file_path: Path) -> List[Dict[str, Any]]:
+        """Read an HTML export and extract its bookmarks without touching the database."""
+        with open(file_path, 'rb') as f:
+            return self.extract_folder_hierarchy(f)
+
+    def parse_html_file(self, file_path: Path,
+                        parsed: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Parse a single HTML bookmark file, reusing a read_bookmarks result when given."""
         results = {
             'bookmarks': [],
             'errors': [],
@@ -206,48 +195,19 @@ class HTMLBookmarkParser:
                 self.logger.info(f"File {file_path.name} already processed, skipping")
                 return results
 
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-
-            soup = BeautifulSoup(content, 'html.parser')
-
-            # Find the main bookmark structure (usually starts with DL)
-            main_dl = soup.find('dl')
-            if not main_dl:
-                self.logger.warning(f"No bookmark structure found in {file_path}")
+            # Extract all bookmarks
+            bookmarks = parsed if parsed is not None else self.read_bookmarks(file_path)
+            if not bookmarks:
+                self.logger.warning(f"No bookmarks found in {file_path}")
                 return results
 
-            # Extract all bookmarks
-            bookmarks = self.extract_folder_hierarchy(main_dl)
             results['bookmarks'] = bookmarks
             results['stats']['total_found'] = len(bookmarks)
 
-            # Import bookmarks to database
-            for bookmark in bookmarks:
-                try:
-                    bookmark_data = {
-                        'url': bookmark['url'],
-                        'title': bookmark['title'],
-                        'description': bookmark.get('description', ''),
-                        'source': 'browser_export',
-                        'source_file': str(file_path),
-                        'created_at': bookmark['created_at']
-                    }
-
-                    bookmark_id = self.db.insert_bookmark(bookmark_data)
-                    if bookmark_id:
-                        # Add tags based on folder structure
-                        if bookmark.get('tags'):
-                            self.db.add_bookmark_tags(bookmark_id, bookmark['tags'])
-                        results['stats']['imported'] += 1
-                    else:
-                        results['stats']['skipped'] += 1
-
-                except Exception as e:
-                    error_msg = f"Error importing bookmark {bookmark.get('url', '')}: {e}"
-                    results['errors'].append(error_msg)
-                    results['stats']['errors'] += 1
-                    self.logger.error(error_msg)
+            # Import bookmarks and their tags to the database in bulk
+            imported, skipped = self.db.import_parsed_bookmarks(bookmarks, str(file_path), 'browser_export')
+            results['stats']['imported'] = imported
+            results['stats']['skipped'] = skipped
 
             # Record import in history
             self.db.record_import(
@@ -284,16 +244,21 @@ class HTMLBookmarkParser:
         }
 
         try:
-            # Find all HTML files that look like bookmark exports
-            html_files = []
-            for pattern in ['bookmarks_*.html', 'Raindrop*.html', '*.html']:
-                html_files.extend(directory_path.glob(pattern))
+            # Find all HTML files; '*.html' already covers the bookmarks_* and
+            # Raindrop* exports, which globbing separately listed two or three times
+            html_files = sorted(directory_path.glob('*.html'))
 
             self.logger.info(f"Found {len(html_files)} HTML files to process")
 
-            for html_file in html_files:
+            # Only files not yet imported are worth parsing; the hash is cached
+            unprocessed = [html_file for html_file in html_files
+                           if not self.db.is_file_processed(str(html_file),
+                                                            self.calculate_file_hash(html_file))]
+
+            for html_file, parsed in parse_files_in_workers(HTMLBookmarkParser(None).read_bookmarks,
+                                                            html_files, unprocessed):
                 try:
-                    file_results = self.parse_html_file(html_file)
+                    file_results = self.parse_html_file(html_file, parsed)
 
                     results['files_processed'] += 1
                     results['total_bookmarks'] += file_results['stats']['total_found']
@@ -315,36 +280,10 @@ class HTMLBookmarkParser:
         return results
 
     def get_folder_statistics(self, directory_path: Path) -> Dict[str, Any]:
-        """Get statistics about bookmark folders across all HTML files."""
-        folder_stats = {}
-
-        try:
-            html_files = list(directory_path.glob('bookmarks_*.html'))
-            html_files.extend(directory_path.glob('Raindrop*.html'))
-
-            for html_file in html_files:
-                try:
-                    with open(html_file, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-
-                    soup = BeautifulSoup(content, 'html.parser')
-                    main_dl = soup.find('dl')
-                    if main_dl:
-                        bookmarks = self.extract_folder_hierarchy(main_dl)
-
-                        for bookmark in bookmarks:
-                            for folder in bookmark.get('folder_path', []):
-                                if folder not in folder_stats:
-                                    folder_stats[folder] = 0
-                                folder_stats[folder] += 1
-
-                except Exception as e:
-                    self.logger.error(f"Error analyzing {html_file}: {e}")
-
-        except Exception as e:
-            self.logger.error(f"Error getting folder statistics: {e}")
-
-        return dict(sorted(folder_stats.items(), key=lambda x: x[1], reverse=True))
+        """Get statistics about bookmark folders across the HTML files imported from a directory."""
+        # Folder paths were stored as tags at import time, so count those
+        # instead of parsing every export again
+        return self.db.get_tag_counts('browser_export', os.path.join(str(directory_path), ''))
 
 
 def main():
@@ -181,32 +181,10 @@ class YAMLBookmarkParser:
             results['bookmarks'] = bookmarks
             results['stats']['total_found'] = len(bookmarks)
 
-            # Import bookmarks to database
-            for bookmark in bookmarks:
-                try:
-                    bookmark_data = {
-                        'url': bookmark['url'],
-                        'title': bookmark['title'],
-                        'description': bookmark['description'],
-                        'source': bookmark['source'],
-                        'source_file': str(file_path),
-                        'created_at': bookmark['created_at']
-                    }
-
-                    bookmark_id = self.db.insert_bookmark(bookmark_data)
-                    if bookmark_id:
-                        # Add tags if present
-                        if bookmark.get('tags'):
-                            self.db.add_bookmark_tags(bookmark_id, bookmark['tags'])
-                        results['stats']['imported'] += 1
-                    else:
-                        results['stats']['skipped'] += 1
-
-                except Exception as e:
-                    error_msg = f"Error importing bookmark {bookmark.get('url', '')}: {e}"
-                    results['errors'].append(error_msg)
-                    results['stats']['errors'] += 1
-                    self.logger.error(error_msg)
+            # Import bookmarks and their tags to the database in bulk
+            imported, skipped = self.db.import_parsed_bookmarks(bookmarks, str(file_path), 'yaml_structured')
+            results['stats']['imported'] = imported
+            results['stats']['skipped'] = skipped
 
             # Record import in history
             self.db.record_import(
@@ -4,13 +4,14 @@ Handles various forms of duplicate detection and merging.
 """
 import re
 import hashlib
-import difflib
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple, Set
 from urllib.parse import urlparse, parse_qs, urlunparse
 import logging
 from datetime import datetime
-from collections import defaultdict
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, deque
+from rapidfuzz import fuzz
 
 from models.database import DatabaseManager
 
@@ -136,7 +137,7 @@ class BookmarkDeduplicator:
             return result
 
     def _fast_string_similarity(self, s1: str, s2: str) -> float:
-        """Fast string similarity using optimized algorithm."""
+        """Fast string similarity using RapidFuzz's C++ normalized Indel ratio."""
         if not s1 and not s2:
             return 1.0
         if not s1 or not s2:
@@ -144,23 +145,7 @@ class BookmarkDeduplicator:
         if s1 == s2:
             return 1.0
             
-        # Use Jaccard similarity for speed on long strings
-        if len(s1) > 100 or len(s2) > 100:
-            # Convert to character bigrams for better similarity
-            bigrams1 = set(s1[i:i+2] for i in range(len(s1)-1))
-            bigrams2 = set(s2[i:i+2] for i in range(len(s2)-1))
-            
-            if not bigrams1 and not bigrams2:
-                return 1.0
-            if not bigrams1 or not bigrams2:
-                return 0.0
-                
-            intersection = len(bigrams1.intersection(bigrams2))
-            union = len(bigrams1.union(bigrams2))
-            return intersection / union if union > 0 else 0.0
-        else:
-            # Use difflib for shorter strings
-            return difflib.SequenceMatcher(None, s1, s2).ratio()
+        return fuzz.ratio(s1, s2) / 100
 
     def calculate_title_similarity(self, title1: str, title2: str) -> float:
         """Calculate similarity between two titles with optimizations."""
@@ -318,10 +303,21 @@ class BookmarkDeduplicator:
                 'title_words': set(norm_title.split()) if norm_title else set()
             })
         
-        # Compare pairs with early exit conditions
-        for i in range(len(normalized_data)):
-            for j in range(i + 1, len(normalized_data)):
-                item1, item2 = normalized_data[i], normalized_data[j]
+        # Length prefilter: pairs whose normalized URLs differ in length by more
+        # than half of the longer one are never duplicates. With the URLs sorted
+        # by length, each bookmark's compatible partners are one bisected window,
+        # so incompatible pairs are never visited.
+        by_length = sorted(range(len(normalized_data)), key=lambda k: len(normalized_data[k]['norm_url']))
+        lengths = [len(normalized_data[k]['norm_url']) for k in by_length]
+
+        # Compare pairs in the original i < j order so duplicate groups form the
+        # same way, with early exit conditions
+        for i, item1 in enumerate(normalized_data):
+            url_len = len(item1['norm_url'])
+            lo = bisect_left(lengths, (url_len + 1) // 2)
+            hi = bisect_right(lengths, 2 * url_len)
+            for j in sorted(by_length[q] for q in range(lo, hi) if by_length[q] > i):
+                item2 = normalized_data[j]
                 
                 # Skip if already processed
                 pair = tuple(sorted([item1['bookmark']['id'], item2['bookmark']['id']]))
@@ -330,19 +326,14 @@ class BookmarkDeduplicator:
                 processed_pairs.add(pair)
                 
                 # Early exit conditions - skip expensive calculations if obvious non-match
-                # 1. Check if URLs are too different in length
-                url1_len, url2_len = len(item1['norm_url']), len(item2['norm_url'])
-                if abs(url1_len - url2_len) / max(url1_len, url2_len) > 0.5:
-                    continue
-                    
-                # 2. Check if paths are completely different
+                # 1. Check if paths are completely different
                 if (item1['url_parts'].path and item2['url_parts'].path and 
                     not item1['url_parts'].path.startswith(item2['url_parts'].path[:10]) and
                     not item2['url_parts'].path.startswith(item1['url_parts'].path[:10])):
                     if len(item1['title_words'].intersection(item2['title_words'])) < 2:
                         continue
                 
-                # 3. Quick title word overlap check
+                # 2. Quick title word overlap check
                 if item1['title_words'] and item2['title_words']:
                     word_overlap = len(item1['title_words'].intersection(item2['title_words']))
                     word_union = len(item1['title_words'].union(item2['title_words']))
@@ -478,8 +469,11 @@ class BookmarkDeduplicator:
             'similar_duplicates_found': 0,
             'bookmarks_merged': 0,
             'bookmarks_archived': 0,
-            'errors': []
+            'error_count': 0,
+            'error_samples': []
         }
+        # Only the most recent errors are kept for display
+        error_samples = deque(maxlen=10)
 
         try:
             self.logger.info("Starting automatic deduplication...")
@@ -495,6 +489,9 @@ class BookmarkDeduplicator:
                     if merged_id:
                         results['bookmarks_merged'] += 1
                         results['bookmarks_archived'] += len(bookmark_ids) - 1
+                    else:
+                        results['error_count'] += 1
+                        error_samples.append(f"Failed to merge bookmarks {bookmark_ids}")
 
             # Find similar duplicates
             similar_duplicates = self.find_similar_duplicates(similarity_threshold)
@@ -512,12 +509,17 @@ class BookmarkDeduplicator:
                         if merged_id:
                             results['bookmarks_merged'] += 1
                             results['bookmarks_archived'] += len(bookmark_ids) - 1
+                        else:
+                            results['error_count'] += 1
+                            error_samples.append(f"Failed to merge bookmarks {bookmark_ids}")
 
         except Exception as e:
             error_msg = f"Error in auto deduplication: {e}"
-            results['errors'].append(error_msg)
+            results['error_count'] += 1
+            error_samples.append(error_msg)
             self.logger.error(error_msg)
 
+        results['error_samples'] = list(error_samples)
         return results
 
     def generate_deduplication_report(self) -> Dict[str, Any]:
@@ -624,9 +626,9 @@ def main():
             logger.info("Deduplication Results:")
             logger.info(f"  Bookmarks merged: {results['bookmarks_merged']}")
             logger.info(f"  Bookmarks archived: {results['bookmarks_archived']}")
-            if results['errors']:
-                logger.error("Errors:")
-                for error in results['errors']:
+            if results['error_count']:
+                logger.error(f"Errors: {results['error_count']}")
+                for error in results['error_samples']:
                     logger.error(f"  {error}")
 
     except KeyboardInterrupt:
@@ -7,18 +7,24 @@ import requests
 import asyncio
 import aiohttp
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Set
+from typing import List, Dict, Any, Optional, Set, Callable
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 import logging
 from datetime import datetime
 import json
 import hashlib
+import time
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from models.database import DatabaseManager
 
 
+# Cached metadata younger than this is reused without any HTTP request
+DEFAULT_CACHE_MAX_AGE = 7 * 24 * 3600
+
+
 class MetadataExtractor:
     """Extract and enrich bookmark metadata."""
 
@@ -34,8 +40,9 @@ class MetadataExtractor:
             'Upgrade-Insecure-Requests': '1',
         }
 
-    def extract_page_metadata(self, url: str, timeout: int = 10) -> Dict[str, Any]:
-        """Extract metadata from a webpage."""
+    def extract_page_metadata(self, url: str, timeout: int = 10, etag: Optional[str] = None,
+                              last_modified: Optional[str] = None) -> Dict[str, Any]:
+        """Extract metadata from a webpage, optionally as a conditional GET."""
         metadata = {
             'url': url,
             'status_code': None,
@@ -56,14 +63,27 @@ class MetadataExtractor:
             'canonical_url': '',
             'last_modified': None,
             'word_count': 0,
+            'etag': None,
+            'http_last_modified': None,
             'extracted_at': datetime.now().isoformat(),
             'error': None
         }
 
         try:
             self.logger.debug(f"Extracting metadata from: {url}")
-            response = requests.get(url, headers=self.session_headers, timeout=timeout, allow_redirects=True)
+            headers = dict(self.session_headers)
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+            response = requests.get(url, headers=headers, timeout=timeout, allow_redirects=True)
             metadata['status_code'] = response.status_code
+            metadata['etag'] = response.headers.get('ETag')
+            metadata['http_last_modified'] = response.headers.get('Last-Modified')
+
+            if response.status_code == 304:
+                return metadata
 
             if response.status_code != 200:
                 metadata['error'] = f"HTTP {response.status_code}"
@@ -207,8 +227,9 @@ class MetadataExtractor:
         except:
             return 0
 
-    def validate_bookmark_link(self, url: str) -> Dict[str, Any]:
+    def validate_bookmark_link(self, url: str, session: Optional[requests.Session] = None) -> Dict[str, Any]:
         """Check if a bookmark URL is still valid."""
+        http = session or requests
         result = {
             'url': url,
             'is_valid': False,
@@ -219,30 +240,142 @@ class MetadataExtractor:
         }
 
         try:
-            response = requests.head(url, headers=self.session_headers, timeout=10,
-                                   allow_redirects=True)
+            response = http.head(url, headers=self.session_headers, timeout=10,
+                                 allow_redirects=True)
             result['status_code'] = response.status_code
             result['final_url'] = response.url
             result['is_valid'] = 200 <= response.status_code < 400
+            if response.status_code != 405:
+                return result
 
         except requests.exceptions.RequestException as e:
             result['error'] = str(e)
-            # Try with GET if HEAD fails
-            try:
-                response = requests.get(url, headers=self.session_headers, timeout=10,
-                                      allow_redirects=True, stream=True)
-                result['status_code'] = response.status_code
-                result['final_url'] = response.url
-                result['is_valid'] = 200 <= response.status_code < 400
-            except:
-                pass
 
         except Exception as e:
             result['error'] = str(e)
+            return result
+
+        # HEAD failed or is not allowed; ask for a single byte instead
+        try:
+            headers = dict(self.session_headers, Range='bytes=0-0')
+            response = http.get(url, headers=headers, timeout=10,
+                                allow_redirects=True, stream=True)
+            response.close()
+            result['status_code'] = response.status_code
+            result['final_url'] = response.url
+            result['is_valid'] = 200 <= response.status_code < 400
+        except:
+            pass
 
         return result
 
-    def enrich_bookmark(self, bookmark_id: int) -> Dict[str, Any]:
+    def validate_links(self, urls: List[str], max_workers: int = 16) -> Dict[str, Dict[str, Any]]:
+        """Validate URLs concurrently over one pooled session, keyed by URL."""
+        validations = {}
+
+        with requests.Session() as session:
+            # Size the connection pool to the worker count so sockets are reused
+            adapter = requests.adapters.HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                future_to_url = {
+                    executor.submit(self.validate_bookmark_link, url, session): url
+                    for url in urls
+                }
+
+                for future in as_completed(future_to_url):
+                    url = future_to_url[future]
+                    try:
+                        validations[url] = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Error validating {url}: {e}")
+
+                    if len(validations) % 50 == 0:
+                        self.logger.info(f"Validated {len(validations)}/{len(urls)} URLs")
+
+        return validations
+
+    def get_cached_metadata(self, urls: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Load metadata cache rows for a batch of URLs, keyed by URL."""
+        if not urls:
+            return {}
+
+        url_by_hash = dict(zip(self.db.generate_url_hashes(urls), urls))
+        hashes = list(url_by_hash)
+
+        try:
+            cached = {}
+            with self.db.get_connection() as conn:
+                # Chunked to stay well under SQLite's bound-parameter limit
+                for start in range(0, len(hashes), 500):
+                    chunk = hashes[start:start + 500]
+                    placeholders = ','.join('?' for _ in chunk)
+                    cursor = conn.execute(f"""
+                        SELECT url_hash, fetched_at, status_code, etag, last_modified, metadata
+                        FROM metadata_cache
+                        WHERE url_hash IN ({placeholders})
+                    """, chunk)
+                    for row in cursor:
+                        cached[url_by_hash[row['url_hash']]] = dict(row)
+
+            return cached
+
+        except Exception as e:
+            self.logger.error(f"Error loading metadata cache: {e}")
+            return {}
+
+    def store_cached_metadata(self, metadata: Dict[str, Any]) -> None:
+        """Save freshly extracted metadata to the cache."""
+        try:
+            with self.db.get_connection() as conn:
+                conn.execute("""
+                    INSERT OR REPLACE INTO metadata_cache
+                    (url_hash, url, fetched_at, title, description, status_code, etag, last_modified, metadata)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    self.db.generate_url_hash(metadata['url']),
+                    metadata['url'],
+                    int(time.time()),
+                    metadata['title'],
+                    metadata['description'],
+                    metadata['status_code'],
+                    metadata['etag'],
+                    metadata['http_last_modified'],
+                    json.dumps(metadata)
+                ))
+
+        except Exception as e:
+            self.logger.error(f"Error caching metadata for {metadata['url']}: {e}")
+
+    def fetch_metadata(self, url: str, cached: Optional[Dict[str, Any]] = None,
+                       max_age: int = DEFAULT_CACHE_MAX_AGE) -> Dict[str, Any]:
+        """Return page metadata, reusing or revalidating a cached copy when available."""
+        if cached and time.time() - cached['fetched_at'] < max_age:
+            return json.loads(cached['metadata'])
+
+        if cached:
+            metadata = self.extract_page_metadata(url, etag=cached['etag'],
+                                                  last_modified=cached['last_modified'])
+            if metadata['status_code'] == 304:
+                # Unchanged upstream: keep the cached copy and restart its TTL
+                with self.db.get_connection() as conn:
+                    conn.execute(
+                        "UPDATE metadata_cache SET fetched_at = ? WHERE url_hash = ?",
+                        (int(time.time()), self.db.generate_url_hash(url))
+                    )
+                return json.loads(cached['metadata'])
+        else:
+            metadata = self.extract_page_metadata(url)
+
+        if not metadata['error']:
+            self.store_cached_metadata(metadata)
+
+        return metadata
+
+    def enrich_bookmark(self, bookmark_id: int, cached: Optional[Dict[str, Any]] = None,
+                        max_age: int = DEFAULT_CACHE_MAX_AGE) -> Dict[str, Any]:
         """Enrich a single bookmark with metadata."""
         try:
             with self.db.get_connection() as conn:
@@ -253,36 +386,65 @@ class MetadataExtractor:
                 """, (bookmark_id,))
 
                 bookmark = cursor.fetchone()
-                if not bookmark:
-                    return {'error': 'Bookmark not found'}
 
-                bookmark = dict(bookmark)
+            if not bookmark:
+                return {'error': 'Bookmark not found'}
+
+            bookmark = dict(bookmark)
+
+            # Extract metadata outside the connection lock so workers fetch concurrently
+            metadata = self.fetch_metadata(bookmark['url'], cached, max_age)
 
-                # Extract metadata
-                metadata = self.extract_page_metadata(bookmark['url'])
+            # Update bookmark with metadata
+            updates = {}
 
-                # Update bookmark with metadata
-                updates = {}
+            if not bookmark['title'] and metadata['title']:
+                updates['title'] = metadata['title']
+            elif metadata['title'] and metadata['title'] != bookmark['title']:
+                # Store original title if different
+                updates['title'] = metadata['title']
 
-                if not bookmark['title'] and metadata['title']:
-                    updates['title'] = metadata['title']
-                elif metadata['title'] and metadata['title'] != bookmark['title']:
-                    # Store original title if different
-                    updates['title'] = metadata['title']
+            if not bookmark['description'] and metadata['description']:
+                updates['description'] = metadata['description']
 
-                if not bookmark['description'] and metadata['description']:
-                    updates['description'] = metadata['description']
+            # Update additional fields
+            if metadata.get('favicon_url'):
+                updates['favicon_url'] = metadata['favicon_url']
 
-                # Update additional fields
-                if metadata.get('favicon_url'):
-                    updates['favicon_url'] = metadata['favicon_url']
+            if metadata.get('language'):
+                updates['language'] = metadata['language']
 
-                if metadata.get('language'):
-                    updates['language'] = metadata['language']
+            if metadata.get('content_type'):
+                updates['content_type'] = metadata['content_type']
 
-                if metadata.get('content_type'):
-                    updates['content_type'] = metadata['content_type']
+            # Add tags based on metadata
+            new_tags = []
 
+            # Add language as tag
+            if metadata.get('language'):
+                new_tags.append(f"lang:{metadata['language']}")
+
+            # Add domain-based tags
+            try:
+                domain = urlparse(bookmark['url']).netloc.lower()
+                if 'github.com' in domain:
+                    new_tags.append('code')
+                elif any(blog in domain for blog in ['medium.com', 'dev.to', 'blog']):
+                    new_tags.append('blog')
+                elif any(design in domain for design in ['dribbble', 'behance', 'figma']):
+                    new_tags.append('design')
+            except:
+                pass
+
+            # Add content type tags
+            if metadata.get('og_type'):
+                new_tags.append(f"type:{metadata['og_type']}")
+
+            # Add keywords as tags
+            if metadata.get('keywords'):
+                new_tags.extend(metadata['keywords'][:5])  # Limit to 5 keywords
+
+            with self.db.get_connection() as conn:
                 # Update database
                 if updates:
                     update_fields = ', '.join([f"{k} = ?" for k in updates.keys()])
@@ -294,59 +456,34 @@ class MetadataExtractor:
                         WHERE id = ?
                     """, update_values)
 
-                # Add tags based on metadata
-                new_tags = []
-
-                # Add language as tag
-                if metadata.get('language'):
-                    new_tags.append(f"lang:{metadata['language']}")
-
-                # Add domain-based tags
-                try:
-                    domain = urlparse(bookmark['url']).netloc.lower()
-                    if 'github.com' in domain:
-                        new_tags.append('code')
-                    elif any(blog in domain for blog in ['medium.com', 'dev.to', 'blog']):
-                        new_tags.append('blog')
-                    elif any(design in domain for design in ['dribbble', 'behance', 'figma']):
-                        new_tags.append('design')
-                except:
-                    pass
-
-                # Add content type tags
-                if metadata.get('og_type'):
-                    new_tags.append(f"type:{metadata['og_type']}")
-
-                # Add keywords as tags
-                if metadata.get('keywords'):
-                    new_tags.extend(metadata['keywords'][:5])  # Limit to 5 keywords
-
                 # Add new tags to database
                 if new_tags:
                     self.db.add_bookmark_tags(bookmark_id, new_tags)
 
-                conn.commit()
-
-                return {
-                    'bookmark_id': bookmark_id,
-                    'metadata_extracted': True,
-                    'fields_updated': list(updates.keys()),
-                    'tags_added': new_tags,
-                    'metadata': metadata
-                }
+            return {
+                'bookmark_id': bookmark_id,
+                'metadata_extracted': True,
+                'fields_updated': list(updates.keys()),
+                'tags_added': new_tags,
+                'metadata': metadata
+            }
 
         except Exception as e:
             self.logger.error(f"Error enriching bookmark {bookmark_id}: {e}")
             return {'error': str(e)}
 
-    def bulk_enrich_bookmarks(self, batch_size: int = 50, max_workers: int = 5) -> Dict[str, Any]:
-        """Enrich multiple bookmarks in parallel."""
+    def bulk_enrich_bookmarks(self, batch_size: int = 50, max_workers: int = 5,
+                              progress_callback: Optional[Callable[[int], Any]] = None,
+                              max_age: int = DEFAULT_CACHE_MAX_AGE, refresh: bool = False) -> Dict[str, Any]:
+        """Enrich multiple bookmarks in parallel, reporting each completed URL to progress_callback."""
         results = {
             'processed': 0,
             'enriched': 0,
             'errors': 0,
             'error_details': []
         }
+        # Keep a bounded sample of failures; 'errors' holds the full count
+        error_details = deque(maxlen=10)
 
         try:
             with self.db.get_connection() as conn:
@@ -368,11 +505,15 @@ class MetadataExtractor:
 
             self.logger.info(f"Enriching {len(bookmarks)} bookmarks with {max_workers} workers")
 
+            # One cache lookup for the whole batch; fresh entries skip HTTP entirely
+            cache = {} if refresh else self.get_cached_metadata([bookmark['url'] for bookmark in bookmarks])
+
             # Use ThreadPoolExecutor for parallel processing
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
                 # Submit all tasks
                 future_to_bookmark = {
-                    executor.submit(self.enrich_bookmark, bookmark['id']): bookmark
+                    executor.submit(self.enrich_bookmark, bookmark['id'],
+                                    cache.get(bookmark['url']), max_age): bookmark
                     for bookmark in bookmarks
                 }
 
@@ -385,7 +526,7 @@ class MetadataExtractor:
                         result = future.result()
                         if 'error' in result:
                             results['errors'] += 1
-                            results['error_details'].append({
+                            error_details.append({
                                 'bookmark_id': bookmark['id'],
                                 'url': bookmark['url'],
                                 'error': result['error']
@@ -395,23 +536,30 @@ class MetadataExtractor:
 
                     except Exception as e:
                         results['errors'] += 1
-                        results['error_details'].append({
+                        error_details.append({
                             'bookmark_id': bookmark['id'],
                             'url': bookmark['url'],
                             'error': str(e)
                         })
 
+                    if progress_callback:
+                        progress_callback(1)
+
                     # Progress logging
                     if results['processed'] % 10 == 0:
                         self.logger.info(f"Processed {results['processed']}/{len(bookmarks)} bookmarks")
 
+            self.db.flush_tag_counts()
+
         except Exception as e:
             self.logger.error(f"Error in bulk enrichment: {e}")
-            results['error_details'].append({'error': str(e)})
+            error_details.append({'error': str(e)})
 
+        results['error_details'] = list(error_details)
         return results
 
-    def validate_all_bookmarks(self, batch_size: int = 100) -> Dict[str, Any]:
+    def validate_all_bookmarks(self, batch_size: int = 100, max_age: int = DEFAULT_CACHE_MAX_AGE,
+                               refresh: bool = False, max_workers: int = 16) -> Dict[str, Any]:
         """Validate all bookmark URLs."""
         results = {
             'checked': 0,
@@ -432,36 +580,46 @@ class MetadataExtractor:
 
                 bookmarks = [dict(row) for row in cursor.fetchall()]
 
+            cache = {} if refresh else self.get_cached_metadata([bookmark['url'] for bookmark in bookmarks])
+            now = time.time()
+
+            to_check = []
             for bookmark in bookmarks:
-                try:
-                    validation = self.validate_bookmark_link(bookmark['url'])
+                cached = cache.get(bookmark['url'])
+                if cached and cached['status_code'] == 200 and now - cached['fetched_at'] < max_age:
+                    # Page was fetched successfully recently; no need to ask again
                     results['checked'] += 1
-
-                    if validation['is_valid']:
-                        results['valid'] += 1
-                    else:
-                        results['invalid'] += 1
-                        results['broken_links'].append({
-                            'id': bookmark['id'],
-                            'url': bookmark['url'],
-                            'status_code': validation['status_code'],
-                            'error': validation['error']
-                        })
-
-                        # Mark as broken in database
-                        with self.db.get_connection() as conn:
-                            conn.execute("""
-                                UPDATE bookmarks
-                                SET status = 'broken', updated_at = CURRENT_TIMESTAMP
-                                WHERE id = ?
-                            """, (bookmark['id'],))
-
-                    # Progress logging
-                    if results['checked'] % 50 == 0:
-                        self.logger.info(f"Validated {results['checked']}/{len(bookmarks)} URLs")
-
-                except Exception as e:
-                    self.logger.error(f"Error validating bookmark {bookmark['id']}: {e}")
+                    results['valid'] += 1
+                else:
+                    to_check.append(bookmark)
+
+            validations = self.validate_links([bookmark['url'] for bookmark in to_check], max_workers)
+
+            for bookmark in to_check:
+                validation = validations.get(bookmark['url'])
+                if validation is None:
+                    continue
+
+                results['checked'] += 1
+                if validation['is_valid']:
+                    results['valid'] += 1
+                else:
+                    results['invalid'] += 1
+                    results['broken_links'].append({
+                        'id': bookmark['id'],
+                        'url': bookmark['url'],
+                        'status_code': validation['status_code'],
+                        'error': validation['error']
+                    })
+
+            # Mark as broken in database
+            if results['broken_links']:
+                with self.db.get_connection() as conn:
+                    conn.executemany("""
+                        UPDATE bookmarks
+                        SET status = 'broken', updated_at = CURRENT_TIMESTAMP
+                        WHERE id = ?
+                    """, [(link['id'],) for link in results['broken_links']])
 
         except Exception as e:
             self.logger.error(f"Error in bulk validation: {e}")
@@ -0,0 +1,8 @@
+-- DropIndex
+DROP INDEX IF EXISTS "idx_bookmarks_url_hash";
+
+-- DropIndex
+DROP INDEX IF EXISTS "idx_bookmarks_url";
+
+-- DropIndex
+DROP INDEX IF EXISTS "idx_tags_name";